@@ -0,0 +1,48 @@
+"""Slice extraction time per orientation, strided versus contiguous layouts, with the memory they cost.
+
+Usage:
+    python bench_layouts.py [--slices 400] [--size 512]
+"""
+import argparse, os, sys, time
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:                                   #let the benchmark import the viewer modules
+    sys.path.insert(0, SRC_DIR)
+
+from volume_layouts import oriented_view, build_layouts, memory_report
+
+
+def time_slices(volume_for, key, count, repeats=3):
+    """Mean milliseconds to copy one slice of an orientation out of the volume."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i in range(count):
+            volume_for(key)[i].copy()
+    return (time.perf_counter() - start) / (repeats * count) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slices", type=int, default=400)
+    parser.add_argument("--size", type=int, default=512)
+    args = parser.parse_args()
+
+    volume = np.random.default_rng(0).integers(-1024, 2000, (args.slices, args.size, args.size), dtype=np.int16)
+    start = time.perf_counter()
+    layouts = build_layouts(volume)
+    build_seconds = time.perf_counter() - start
+
+    print(f"volume {args.slices}x{args.size}x{args.size} int16, layouts built in {build_seconds:.2f} s")
+    print(f"{'view':<10} {'strided ms':>11} {'contiguous ms':>14}")
+    for axis, key in enumerate(("Axial", "Sagittal", "Coronal")):
+        strided = time_slices(lambda k: oriented_view(volume, k), key, volume.shape[axis])
+        contiguous = time_slices(lambda k: layouts.get(k, volume), key, volume.shape[axis])
+        print(f"{key:<10} {strided:>11.3f} {contiguous:>14.3f}")
+    report = memory_report(volume, layouts)
+    peak = f"{report['peak_rss_mb']:.0f} MB" if report["peak_rss_mb"] is not None else "n/a"
+    print(f"memory: volume {report['volume_mb']:.0f} MB, layouts {report['layouts_mb']:.0f} MB, peak RSS {peak}")
+
+
+if __name__ == "__main__":
+    main()
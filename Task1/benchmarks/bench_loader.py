@@ -0,0 +1,42 @@
+"""Slices/second of the DICOM series loader versus the number of decode workers.
+
+Usage:
+    python bench_loader.py [--slices 256] [--size 512] [--workers 1 2 4 8] [--processes] [--memmap]
+"""
+import argparse, os, tempfile, time
+from synthetic import write_dicom_series
+from volume_layouts import peak_rss_mb
+from dicom_loader import get_series_index, index_files, load_series, MEMMAP_THRESHOLD
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slices", type=int, default=256)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--memmap", action="store_true", help="always back the volume with a memmap")
+    parser.add_argument("--folder", help="benchmark an existing DICOM folder instead of synthetic data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.folder or write_dicom_series(os.path.join(tmp, "series"), args.slices, args.size, args.size)
+        index = get_series_index(folder)
+        files = index_files(folder, index)
+        shape = (index["rows"], index["columns"])
+        print(f"{len(files)} slices of {shape[0]}x{shape[1]}, {'processes' if args.processes else 'threads'}")
+        print(f"{'workers':>8} {'seconds':>9} {'slices/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            volume, errors = load_series(files, shape, workers=workers, use_processes=args.processes,
+                                         memmap_threshold=0 if args.memmap else MEMMAP_THRESHOLD)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.3f} {len(files) / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+        rss = peak_rss_mb()
+        print(f"volume {volume.nbytes / 2**20:.1f} MB, peak RSS " + (f"{rss:.1f} MB" if rss is not None else "n/a"))
+
+
+if __name__ == "__main__":
+    main()
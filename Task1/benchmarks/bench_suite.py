@@ -0,0 +1,162 @@
+"""Benchmark suite of the viewer, with JSON results to compare versions.
+
+Generates a synthetic DICOM series and NIfTI files (.nii and .nii.gz) of the given
+size, then measures with Qt running offscreen:
+    - series load time and time to the first axial image (DICOM, progressive loading)
+    - NIfTI open time and time to the first image
+    - update_views latency (all three views after a display change)
+    - per-step latency of axial scrolling and of a crosshair drag
+    - peak memory of the process after each phase
+
+Usage:
+    python bench_suite.py [--slices 128] [--size 512] [--steps 100] [--output results.json] [--label v1]
+                          [--baseline old_results.json]
+"""
+import argparse, json, os, platform, subprocess, sys, tempfile, time
+from types import SimpleNamespace
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+import synthetic
+from synthetic import write_dicom_series, write_nifti_volume
+from PyQt5.QtWidgets import QApplication
+from Task1 import MedicalImageViewer
+from volume_layouts import peak_rss_mb
+
+
+def summary(times_ms):
+    """mean/p50/p95/max of a list of durations in ms."""
+    times_ms = np.asarray(times_ms, dtype=float)
+    return {"count": int(times_ms.size), "mean_ms": float(times_ms.mean()),
+            "p50_ms": float(np.percentile(times_ms, 50)), "p95_ms": float(np.percentile(times_ms, 95)),
+            "max_ms": float(times_ms.max())}
+
+
+def git_revision():
+    """Commit of the checked-out tree, so results can be matched to versions (None outside git)."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=synthetic.SRC_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_for_load(app, viewer, timeout=600):
+    """Process Qt events until the background series load is over."""
+    deadline = time.perf_counter() + timeout
+    while viewer.load_thread is not None or viewer.decoded_slices is not None:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("series load did not finish")
+        app.processEvents()
+        time.sleep(0.001)
+    viewer.wait_for_views(app)
+
+
+def bench_dicom_load(app, viewer, folder):
+    start = time.perf_counter()
+    viewer.load_dicom_folder(folder)
+    wait_for_load(app, viewer)
+    return {"load_s": time.perf_counter() - start, "time_to_first_image_s": viewer.time_to_first_image,
+            "slices": int(viewer.image_volume.shape[0]), "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_nifti_load(app, viewer, path):
+    start = time.perf_counter()
+    viewer.load_nifti_file(path)
+    opened = time.perf_counter() - start
+    viewer.wait_for_views(app)
+    return {"open_s": opened, "time_to_first_image_s": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_update_views(app, viewer, steps):
+    """update_views after a display change: all three slices are prepared again and redrawn."""
+    times = []
+    for step in range(steps):
+        start = time.perf_counter()
+        viewer.brightness_slider.setValue(step % 2)                 #update_display -> update_views
+        viewer.wait_for_views(app)
+        times.append((time.perf_counter() - start) * 1000)
+    viewer.brightness_slider.setValue(0)
+    return summary(times)
+
+
+def bench_scroll(app, viewer, steps):
+    times = []
+    count = viewer.image_volume.shape[0]
+    for step in range(steps):
+        start = time.perf_counter()
+        viewer.axial_slider.setValue(step % count)
+        viewer.wait_for_views(app)
+        times.append((time.perf_counter() - start) * 1000)
+    return summary(times)
+
+
+def bench_crosshair_drag(app, viewer, steps):
+    """Mouse moves over the axial view; each one moves two sliders and the crosshair."""
+    times = []
+    rows, columns = viewer.image_volume.shape[1:]
+    for step in range(steps):
+        event = SimpleNamespace(inaxes=True, xdata=10 + step % (columns - 20), ydata=10 + step % (rows - 20),
+                                canvas=viewer.axial_canvas)
+        start = time.perf_counter()
+        viewer.handle_cursor_motion(event)
+        viewer.wait_for_views(app)
+        times.append((time.perf_counter() - start) * 1000)
+    return summary(times)
+
+
+def compare(baseline, results):
+    """Print every timing next to the one of an earlier run."""
+    for section, values in results.items():
+        if not isinstance(values, dict) or not isinstance(baseline.get(section), dict):
+            continue
+        for name, value in values.items():
+            old = baseline[section].get(name)
+            if name.endswith(("_s", "_ms")) and value is not None and old:
+                print(f"{section + '.' + name:<36} {old:10.3f} -> {value:10.3f}  ({value / old:5.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slices", type=int, default=128)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--output", default="results.json")
+    parser.add_argument("--label", help="name of this run in the JSON (e.g. a version)")
+    parser.add_argument("--baseline", help="results.json of an earlier run to compare with")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    viewer = MedicalImageViewer()
+    viewer.series_cache.budget_bytes = 0                            #measure decoding, not the series cache
+    viewer.show()
+    app.processEvents()
+    results = {"label": args.label, "revision": git_revision(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "platform": {"python": platform.python_version(), "machine": platform.machine(),
+                            "system": platform.system(), "cpus": os.cpu_count()},
+               "params": {"slices": args.slices, "size": args.size, "steps": args.steps}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = write_dicom_series(os.path.join(tmp, "series"), args.slices, args.size, args.size)
+        nifti_paths = {suffix: write_nifti_volume(os.path.join(tmp, f"volume.{suffix}"), args.slices, args.size,
+                                                  args.size) for suffix in ("nii", "nii.gz")}
+
+        results["dicom"] = bench_dicom_load(app, viewer, folder)
+        results["update_views"] = bench_update_views(app, viewer, args.steps)
+        results["axial_scroll"] = bench_scroll(app, viewer, args.steps)
+        results["crosshair_drag"] = bench_crosshair_drag(app, viewer, args.steps)
+        for suffix, path in nifti_paths.items():
+            results[suffix] = bench_nifti_load(app, viewer, path)
+        results["peak_rss_mb"] = peak_rss_mb()
+        viewer.close()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-view update latency of the viewer (target: under 16 ms per view on a 512x512 slice).
+
+Usage:
+    python bench_views.py [--slices 200] [--size 512] [--steps 100]
+"""
+import argparse, os, sys, time
+from types import SimpleNamespace
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+import numpy as np
+import synthetic
+from PyQt5.QtWidgets import QApplication
+from Task1 import MedicalImageViewer
+
+
+def percentile_line(name, times_ms):
+    times_ms = np.asarray(times_ms)
+    return (f"{name:<14} mean {times_ms.mean():7.2f} ms  p50 {np.percentile(times_ms, 50):7.2f} ms  "
+            f"p95 {np.percentile(times_ms, 95):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slices", type=int, default=200)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    viewer = MedicalImageViewer()
+    viewer.show()
+    volume = np.stack([synthetic.phantom_slice(args.size, args.size, z, args.slices) for z in range(args.slices)])
+    viewer.set_volume(volume, {"rescale": (1.0, -1024.0), "window": (40.0, 400.0)})
+    app.processEvents()
+
+    view_times = []
+    for step in range(args.steps):
+        viewer.axial_slider.setValue(step % args.slices)
+        viewer.wait_for_views(app)
+        view_times.append(viewer.slice_views[viewer.axial_canvas].last_update_ms)
+    print(f"{args.slices} slices of {args.size}x{args.size}")
+    print(percentile_line("axial view", view_times))
+    status = "OK" if np.percentile(view_times, 95) < 16 else "above target"
+    print(f"target 16 ms per view update: {status}")
+    counters = viewer.prefetcher.counters
+    print(f"prefetch: {counters['hits']} cache hits, {counters['misses']} misses, {counters['prefetched']} slices prepared ahead")
+
+    #a crosshair drag on the axial view: each mouse move changes two sliders and the crosshair
+    viewer.wait_for_views(app)
+    viewer.scheduler.reset_counters()
+    start = time.perf_counter()
+    for step in range(args.steps):
+        x = y = 10 + step % (args.size - 20)
+        event = SimpleNamespace(inaxes=True, xdata=x, ydata=y, canvas=viewer.axial_canvas)
+        viewer.handle_cursor_motion(event)
+        app.processEvents()
+    while viewer.scheduler.dirty or viewer.slice_pipeline.busy():
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    counters = viewer.scheduler.counters
+    print(f"crosshair drag: {args.steps} mouse moves in {elapsed:.2f} s, {counters['requests']} view requests, "
+          f"{counters['renders']} view renders in {counters['frames']} frames")
+
+
+if __name__ == "__main__":
+    main()
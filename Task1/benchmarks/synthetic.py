@@ -0,0 +1,81 @@
+"""Synthetic test data for the Task1 benchmarks (generated locally, nothing is downloaded)."""
+import os, sys, numpy as np, pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:                                   #let the benchmarks import the viewer modules
+    sys.path.insert(0, SRC_DIR)
+
+CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2"
+
+
+def phantom_slice(rows, columns, z, slices):
+    """A simple int16 phantom: a sphere of 'tissue' in 'air' with some noise."""
+    y, x = np.ogrid[:rows, :columns]
+    radius = min(rows, columns) * 0.4 * np.sqrt(max(0.0, 1 - ((z - slices / 2) / (slices / 2 + 1)) ** 2))
+    inside = (x - columns / 2) ** 2 + (y - rows / 2) ** 2 <= radius ** 2
+    image = np.where(inside, 1040, 24).astype(np.int16)
+    rng = np.random.default_rng(z)
+    image += rng.integers(-20, 20, size=image.shape, dtype=np.int16)
+    return image
+
+
+def write_dicom_series(folder, slices=64, rows=512, columns=512, spacing=(0.7, 0.7), thickness=2.5, shuffle_names=True):
+    """Write a CT-like series of single-frame DICOM files into folder and return the folder."""
+    os.makedirs(folder, exist_ok=True)
+    series_uid = generate_uid()
+    study_uid = generate_uid()
+    order = np.random.default_rng(0).permutation(slices) if shuffle_names else np.arange(slices)
+    for z in range(slices):
+        meta = FileMetaDataset()
+        meta.MediaStorageSOPClassUID = CT_IMAGE_STORAGE
+        meta.MediaStorageSOPInstanceUID = generate_uid()
+        meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+        ds = Dataset()
+        ds.file_meta = meta
+        ds.preamble = b"\0" * 128
+        ds.SOPClassUID = CT_IMAGE_STORAGE
+        ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+        ds.StudyInstanceUID = study_uid
+        ds.SeriesInstanceUID = series_uid
+        ds.Modality = "CT"
+        ds.PatientName = "Synthetic^Phantom"
+        ds.InstanceNumber = z + 1
+        ds.ImagePositionPatient = [0.0, 0.0, float(z * thickness)]
+        ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+        ds.PixelSpacing = [float(spacing[0]), float(spacing[1])]
+        ds.SliceThickness = float(thickness)
+        ds.Rows = rows
+        ds.Columns = columns
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated = 16
+        ds.BitsStored = 16
+        ds.HighBit = 15
+        ds.PixelRepresentation = 1
+        ds.RescaleSlope = 1.0
+        ds.RescaleIntercept = -1024.0
+        ds.WindowCenter = 40.0
+        ds.WindowWidth = 400.0
+        ds.PixelData = phantom_slice(rows, columns, z, slices).tobytes()
+        if int(pydicom.__version__.split(".")[0]) < 3:        #older pydicom needs the encoding on the dataset
+            ds.is_little_endian = True
+            ds.is_implicit_VR = False
+        ds.save_as(os.path.join(folder, f"IM{order[z]:05d}.dcm"))
+    return folder
+
+
+
+def write_nifti_volume(path, slices=64, rows=512, columns=512, spacing=(0.7, 0.7), thickness=2.5):
+    """Write the same int16 phantom as a NIfTI file (.nii or .nii.gz, from the name) and return the path."""
+    import nibabel as nib
+    volume = np.stack([phantom_slice(rows, columns, z, slices) for z in range(slices)])
+    zooms = (float(spacing[0]), float(spacing[1]), float(thickness))
+    image = nib.Nifti1Image(np.transpose(volume, (1, 2, 0)), np.diag([*zooms, 1.0]))   #read back as (slices, rows, columns)
+    image.header.set_zooms(zooms)
+    image.header.set_slope_inter(1.0, -1024.0)
+    image.header["cal_min"], image.header["cal_max"] = -160.0, 240.0
+    nib.save(image, path)
+    return path
@@ -1,10 +1,133 @@
-import sys, os, pydicom, numpy as np , nibabel as nib
+import os, sys, time, threading, numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from PyQt5.QtWidgets import(QApplication,QWidget,QPushButton,QVBoxLayout,QFileDialog,QLabel,QGridLayout,QSlider,QMessageBox,QToolBar,QProgressDialog)
-from PyQt5.QtCore import Qt 
+from PyQt5.QtWidgets import(QApplication,QWidget,QPushButton,QVBoxLayout,QFileDialog,QLabel,QGridLayout,QSlider,QMessageBox,QToolBar,QProgressDialog,QComboBox)
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal
 from PyQt5 import QtCore, QtGui
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from dicom_loader import (list_dicom_files, get_series_index, load_index_volume, volume_info,
+                          allocate_index_volume)
+from display import apply_window, default_window
+from nifti_backend import open_nifti, cache_writer
+from series_cache import SeriesCache
+from slice_view import SliceView
+from update_scheduler import UpdateScheduler
+from slice_prefetch import SlicePrefetcher
+from volume_layouts import oriented_view, build_layouts, memory_report
+from plane_resample import resample_plane
+from slab_projection import SlabProjector, SLAB_MODES
+from timings import recorder, timed
+from slice_pipeline import SlicePipeline
+from folder_watch import FolderWatcher, GrowingVolume, watch_info
+
+VIEW_AXES = {"Axial": 0, "Sagittal": 1, "Coronal": 2}          #axis of the volume each view slices through
+
+
+class SeriesLoadWorker(QObject):
+    """Decodes a DICOM series on a background thread and reports progress to the GUI.
+
+    Every signal but status starts with the generation the load was started with, so the
+    GUI can drop what a superseded load still sends.
+    """
+    status = pyqtSignal(str)                #text for the progress dialog
+    progress = pyqtSignal(int, int, int)    #(generation, files done, total files)
+    finished = pyqtSignal(int, object)      #(generation, (volume, errors, info) or None when cancelled)
+    failed = pyqtSignal(int, str)
+    volume_ready = pyqtSignal(int, object, object)  #progressive mode: the empty volume and its info, before decoding starts
+    slice_ready = pyqtSignal(int, int)              #progressive mode: slice i has been decoded into the volume
+
+    def __init__(self, folder_path, files, workers=None, cache=None, progressive=False, generation=0):
+        super().__init__()
+        self.folder_path = folder_path
+        self.files = files
+        self.workers = workers
+        self.cache = cache
+        self.progressive = progressive
+        self.generation = generation
+        self.cancelled = threading.Event()          #set from the GUI thread while run() is busy
+
+    def report_progress(self, done, total):
+        self.progress.emit(self.generation, done, total)
+
+    def report_slice(self, index):
+        self.slice_ready.emit(self.generation, index)
+
+    def run(self):
+        try:
+            #headers first: the saved index gives the slice order, otherwise a quick header-only scan builds it
+            self.status.emit("Scanning DICOM headers...")
+            index = get_series_index(self.folder_path, self.files, self.workers, progress=self.report_progress)
+            if self.cancelled.is_set():
+                self.finished.emit(self.generation, None)
+                return
+            #a series decoded before is opened straight from the cache
+            if self.cache is not None:
+                cached = self.cache.get(index)
+                if cached is not None:
+                    self.finished.emit(self.generation, cached)
+                    return
+            #pixels are decoded only once the order of the slices is known, straight into a volume sized from the index
+            self.status.emit("Loading DICOM files...")
+            volume = allocate_index_volume(index)
+            if self.progressive:                                              #let the GUI show the volume while it fills up
+                self.volume_ready.emit(self.generation, volume, volume_info(index))
+            result = load_index_volume(self.folder_path, index, workers=self.workers, volume=volume,
+                                       progress=self.report_progress, cancel=self.cancelled.is_set,
+                                       center_first=self.progressive,
+                                       on_slice=self.report_slice if self.progressive else None)
+            if result is not None:
+                result = (result[0], [tuple(skipped) for skipped in index["skipped"]] + result[1], volume_info(index))
+        except Exception as e:
+            self.failed.emit(self.generation, str(e))
+            return
+        self.finished.emit(self.generation, result)
+        if result is not None and self.cache is not None:                   #the volume is shown before its copy is written
+            cache_writer.submit(self.cache.put, index, *result)
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class LayoutBuildWorker(QObject):
+    """Copies the volume into sagittal- and coronal-contiguous layouts on a background thread."""
+    finished = pyqtSignal(object, object)   #(volume, layouts) with layouts None when cancelled
+
+    def __init__(self, volume):
+        super().__init__()
+        self.volume = volume
+        self.cancelled = False
+
+    def run(self):
+        self.finished.emit(self.volume, build_layouts(self.volume, cancel=lambda: self.cancelled))
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FolderWatchWorker(QObject):
+    """Polls a folder on a background thread and decodes the DICOM files that arrive in it."""
+    batch = pyqtSignal(object, object, object)  #([(key, pixels)], [(file, message)], header of the first slice)
+    failed = pyqtSignal(str)
+
+    def __init__(self, folder_path, interval=1.0):
+        super().__init__()
+        self.watcher = FolderWatcher(folder_path)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                slices, errors = self.watcher.poll()
+                if slices or errors:
+                    self.batch.emit(slices, errors, self.watcher.series)
+                self.stopped.wait(self.interval)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def cancel(self):
+        self.stopped.set()
+
 
 class MedicalImageViewer(QWidget):
     def __init__(self):
@@ -78,6 +201,27 @@ class MedicalImageViewer(QWidget):
         self.toolbar.addWidget(self.zoom_out_button)                     #adding it to the Layout
         self.zoom_out_button.clicked.connect(self.zoom_out)              #connecting to relative method
         self.zoom_out_button.setEnabled(False)                           #Initializing it to disabled until we switch to the zoom mode later
+        # THE "Contiguous Layouts" BUTTON
+        self.layouts_button = QPushButton('Contiguous Layouts', self)    #create
+        self.layouts_button.setCheckable(True)                           #on: sagittal/coronal copies are built after each load
+        self.toolbar.addWidget(self.layouts_button)                      #adding it to the Layout
+        self.layouts_button.toggled.connect(self.toggle_layouts)         #connecting to relative method
+        # THE "Timings" BUTTON
+        self.timings_button = QPushButton('Timings', self)               #create
+        self.timings_button.setCheckable(True)                           #on: hot-path timings are recorded and shown over the views
+        self.toolbar.addWidget(self.timings_button)                      #adding it to the Layout
+        self.timings_button.toggled.connect(self.toggle_timings)         #connecting to relative method
+        # THE "Watch Folder" BUTTON
+        self.watch_button = QPushButton('Watch Folder', self)            #create
+        self.watch_button.setCheckable(True)                             #on: new slices written into a folder are added as they arrive
+        self.toolbar.addWidget(self.watch_button)                        #adding it to the Layout
+        self.watch_button.toggled.connect(self.toggle_watch)             #connecting to relative method
+        # THE "Physical Spacing" BUTTON
+        self.spacing_button = QPushButton('Physical Spacing', self)      #create
+        self.spacing_button.setCheckable(True)                           #on: each view is resampled to square millimetres
+        self.spacing_button.setChecked(True)
+        self.toolbar.addWidget(self.spacing_button)                      #adding it to the Layout
+        self.spacing_button.toggled.connect(self.update_display)         #connecting to relative method
 
         #Creating the places that will contain the 2D Images with their labels and sliders then adding them to the grid
         #Axial
@@ -131,6 +275,14 @@ class MedicalImageViewer(QWidget):
         self.coronal_canvas.mpl_connect('button_release_event', self.on_mouse_release)
         self.coronal_canvas.mpl_connect('motion_notify_event', self.on_mouse_motion)
 
+        #Long-lived image and crosshair artists for each canvas, updated in place instead of redrawn from scratch
+        self.slice_views = {canvas: SliceView(canvas) for canvas in (self.axial_canvas, self.sagittal_canvas, self.coronal_canvas)}
+        self.scheduler = UpdateScheduler(self.render_views)                 #merges bursts of view updates into one render per frame
+        self.view_canvases = {"Axial": self.axial_canvas, "Sagittal": self.sagittal_canvas, "Coronal": self.coronal_canvas}
+        self.prefetcher = SlicePrefetcher(self.prepare_slice)                #prepares the next slices in the scroll direction
+        self.slice_pipeline = SlicePipeline(self.prepare_slice)             #prepares the requested slices off the GUI thread
+        self.slice_pipeline.ready.connect(self.on_slice_prepared)
+
         #create sliders for brightness and contrast with labels then adding them to the Full UI layout directly 
         #Brightness
         self.brightness_slider = QSlider()                                 #creates a slider
@@ -138,7 +290,7 @@ class MedicalImageViewer(QWidget):
         self.brightness_slider.setOrientation(1)                           #making the slider vertical 
         self.brightness_slider.setRange(-255, 255)                         #setting the range of values for the slider
         self.brightness_slider.setValue(0)                                 #setting the initial value
-        self.brightness_slider.valueChanged.connect(self.update_views)     #when the value changes call a method to update the views
+        self.brightness_slider.valueChanged.connect(self.update_display)   #when the value changes call a method to update the views
         self.layout.addWidget(self.brightness_slider)                      #add the slider to the layout
 
         #Contrast
@@ -147,9 +299,45 @@ class MedicalImageViewer(QWidget):
         self.contrast_slider.setOrientation(1)
         self.contrast_slider.setRange(-255, 255)
         self.contrast_slider.setValue(0)
-        self.contrast_slider.valueChanged.connect(self.update_views)        
+        self.contrast_slider.valueChanged.connect(self.update_display)
         self.layout.addWidget(self.contrast_slider) 
 
+        #Window level / width (in the units of the data, e.g. HU), mapped on 0..1000 of the loaded value range
+        self.level_slider = QSlider()
+        self.layout.addWidget(QLabel("Window Level"))
+        self.level_slider.setOrientation(1)
+        self.level_slider.setRange(0, 1000)
+        self.level_slider.setValue(500)
+        self.level_slider.valueChanged.connect(self.update_window)
+        self.layout.addWidget(self.level_slider)
+
+        self.width_slider = QSlider()
+        self.layout.addWidget(QLabel("Window Width"))
+        self.width_slider.setOrientation(1)
+        self.width_slider.setRange(1, 2000)
+        self.width_slider.setValue(1000)
+        self.width_slider.valueChanged.connect(self.update_window)
+        self.layout.addWidget(self.width_slider)
+
+        #Thick slab: each view shows the MIP/MinIP/average of this many slices around the current one (1 = single slice)
+        self.slab_mode_box = QComboBox()
+        self.layout.addWidget(QLabel("Slab Mode"))
+        self.slab_mode_box.addItems(SLAB_MODES)
+        self.slab_mode_box.currentIndexChanged.connect(self.update_display)
+        self.layout.addWidget(self.slab_mode_box)
+
+        self.slab_slider = QSlider()
+        self.layout.addWidget(QLabel("Slab Thickness"))
+        self.slab_slider.setOrientation(1)
+        self.slab_slider.setRange(1, 64)
+        self.slab_slider.setValue(1)
+        self.slab_slider.valueChanged.connect(self.update_display)
+        self.layout.addWidget(self.slab_slider)
+
+        #Status line (background work and memory reports)
+        self.status_label = QLabel("")
+        self.layout.addWidget(self.status_label)
+
         #Creating the custom mouse shapes for the zoom in and zoom out modes
         #Zoom in
         pm = QtGui.QPixmap(32, 32)                                    #create a 32x32 grid
@@ -179,12 +367,45 @@ class MedicalImageViewer(QWidget):
         self.zoom_factor = 1.0
 
         self.image_volume = None
+        self.rescale = (1.0, 0.0)
+        self.spacing = (1.0, 1.0, 1.0)                      #(slice, row, column) voxel spacing in mm
+        self.window = None
+        self.value_range = None
         self.axial_index = None
         self.sagittal_index = None
         self.coronal_index = None
         self.axial_crosshair = None
         self.sagittal_crosshair = None
         self.coronal_crosshair = None
+        self.load_thread = None
+        self.load_worker = None
+        self.load_progress = None
+        self.load_generation = 0                            #bumped for every load: results of older ones are dropped
+        self.series_cache = SeriesCache.from_environment()
+        self.progressive_loading = True                     #show slices while the series is still decoding
+        self.load_started = None
+        self.time_to_first_image = None                     #seconds from load_dicom_folder to the first real axial image
+        self.decoded_slices = None                          #slices decoded so far during a progressive load
+        self.partial_refresh_timer = QtCore.QTimer(self)
+        self.partial_refresh_timer.setInterval(250)
+        self.partial_refresh_timer.timeout.connect(self.refresh_partial_views)
+        self.layouts = {}                                   #contiguous sagittal/coronal copies of layouts_volume
+        self.layouts_volume = None
+        self.layout_thread = None
+        self.layout_worker = None
+        self.slab_projectors = {}                           #SlabProjector of each view, reused while the slab slides
+        self.watch_thread = None
+        self.watch_worker = None
+        self.watch_volume = None                            #GrowingVolume of the watched folder
+
+        #Timing overlay (top right corner), refreshed twice a second while timings are recorded
+        self.timing_overlay = QLabel(self)
+        self.timing_overlay.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #7CFC00; padding: 4px;")
+        self.timing_overlay.hide()
+        self.timing_timer = QtCore.QTimer(self)
+        self.timing_timer.setInterval(500)
+        self.timing_timer.timeout.connect(self.refresh_timing_overlay)
+        self.timings_button.setChecked(recorder.enabled)                #TASK1_TIMINGS=1 turns them on at startup
 
         #Finalizing UI
         self.image_label = QLabel(self)
@@ -192,128 +413,190 @@ class MedicalImageViewer(QWidget):
         self.setLayout(self.layout)
         self.set_cursor_mode()
 
-    #this method takes the file path and reads it
-    def load_dicom_slice(self, filepath):
-        """Load a single DICOM slice with enhanced compression handling."""
-        try:
-            dataset = pydicom.dcmread(filepath)                       #reading the dicom data stored in the file    
-            pixel_array = dataset.pixel_array                         #convert the data to a pixel array
-
-            # Apply rescale slope and intercept
-            if hasattr(dataset, 'RescaleSlope') and hasattr(dataset, 'RescaleIntercept'):            #checks if the file has slope and intercept
-                pixel_array = pixel_array * float(dataset.RescaleSlope) + float(dataset.RescaleIntercept)    # apply y=mx+c
-
-            # Normalize to 8-bit range for consistency
-            if pixel_array.max() != pixel_array.min():                 #checks that there is variation in pixel values (thus there is an image)
-                pixel_array = ((pixel_array - pixel_array.min()) * 255 /                #normalizing then making it in 8 bit range
-                             (pixel_array.max() - pixel_array.min())).astype(np.uint8)
-            else:
-                pixel_array = np.zeros_like(pixel_array, dtype=np.uint8)    #the image is blank so we create an empty array of zeros
-
-            return pixel_array, dataset
-        except Exception as e:
-            raise Exception(f"Error reading DICOM file {filepath}: {str(e)}")
-            
-    
     def load_dicom_folder(self, folder_path):
-        """Load all DICOM files from a folder with compression handling."""
+        """Load all DICOM files from a folder, decoding them on a background thread pool."""
+        self.watch_button.setChecked(False)                     #a loaded series replaces the watched one
         try:
             # Get all DICOM files
-            dicom_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) 
-                          if f.endswith(('.dcm', '.DCM'))]
+            dicom_files = list_dicom_files(folder_path)
             
             if not dicom_files:
                 raise Exception("No DICOM files found in the selected folder.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            print(f"Error details: {str(e)}")  # For debugging
+            return
 
-            # Sort files
-            dicom_files.sort()
-
-            # Create progress dialog
-            progress = QProgressDialog("Loading DICOM files...", "Cancel", 0, len(dicom_files), self)
-            progress.setWindowModality(Qt.WindowModal)
-                         
-            for i, file in enumerate(dicom_files):
-                try:
-                    dataset = pydicom.dcmread(file)
-                except Exception as e:
-                    QMessageBox.warning(self, "Warning", f"Error reading file {file}: {str(e)}")
-                    continue
-                progress.setValue(i)
-                if progress.wasCanceled():
-                    return
-
-            # Second pass: load and process slices
-            slices = []
-            progress.setLabelText("Processing DICOM files...")
-            progress.setValue(0)
-
-            for i, file in enumerate(dicom_files):
-                try:
-                    pixel_array, _ = self.load_dicom_slice(file)                    
-                    slices.append(pixel_array)
-                    progress.setValue(i)
-                    if progress.wasCanceled():
-                        return
-                        
-                except Exception as e:
-                    QMessageBox.warning(self, "Warning", f"Skipping file {file}: {str(e)}")
-                    continue
-
-            progress.setValue(len(dicom_files))
-
-            if not slices:
-                raise Exception("No valid DICOM slices could be loaded.")
-
-            # Convert to volume
-            self.image_volume = np.array(slices)
-
-            # Initialize indices
-            self.axial_index = self.image_volume.shape[0] // 2
-            self.sagittal_index = self.image_volume.shape[1] // 2
-            self.coronal_index = self.image_volume.shape[2] // 2
-            # Update sliders
-            self.axial_slider.setRange(0, self.image_volume.shape[0] - 1)
-            self.sagittal_slider.setRange(0, self.image_volume.shape[1] - 1)
-            self.coronal_slider.setRange(0, self.image_volume.shape[2] - 1)
-            
-            self.axial_slider.setValue(self.axial_index)
-            self.sagittal_slider.setValue(self.sagittal_index)
-            self.coronal_slider.setValue(self.coronal_index)
+        self.cancel_loading()                                             #a series is already loading, stop it first
+
+        # Create progress dialog (in progressive mode the viewer stays usable while it is open)
+        self.load_progress = QProgressDialog("Loading DICOM files...", "Cancel", 0, len(dicom_files), self)
+        self.load_progress.setWindowModality(Qt.NonModal if self.progressive_loading else Qt.WindowModal)
+        self.load_started = time.perf_counter()
+        self.time_to_first_image = None
+
+        #each file is read and decoded once, inside a pool that runs off the GUI thread
+        self.load_thread = QThread(self)
+        self.load_worker = SeriesLoadWorker(folder_path, dicom_files, cache=self.series_cache,
+                                            progressive=self.progressive_loading, generation=self.load_generation)
+        self.load_worker.moveToThread(self.load_thread)
+        self.load_thread.started.connect(self.load_worker.run)
+        self.load_worker.status.connect(self.load_progress.setLabelText)
+        self.load_worker.progress.connect(self.on_load_progress)
+        self.load_worker.finished.connect(self.on_load_finished)
+        self.load_worker.failed.connect(self.on_load_failed)
+        self.load_worker.volume_ready.connect(self.on_volume_ready)
+        self.load_worker.slice_ready.connect(self.on_slice_ready)
+        #direct: the worker's thread is busy in run(), a queued call would only arrive once loading is over
+        self.load_progress.canceled.connect(self.load_worker.cancel, Qt.DirectConnection)
+        self.load_thread.start()
+
+    def on_load_progress(self, generation, done, total):
+        """Move the progress bar as slices get decoded."""
+        if generation == self.load_generation and self.load_progress is not None:
+            if self.load_progress.wasCanceled():                          #cancel() called without the button
+                self.load_worker.cancel()
+                return
+            self.load_progress.setMaximum(total)
+            self.load_progress.setValue(done)
+
+    def on_volume_ready(self, generation, volume, info):
+        """Progressive mode: show the (still empty) volume right away, slices appear as they are decoded."""
+        if generation != self.load_generation:
+            return
+        self.decoded_slices = set()
+        self.set_volume(volume, info, progressive=True)
+        self.partial_refresh_timer.start()
 
-            # Create volume rendering and show views
-            self.show_views()
+    def on_slice_ready(self, generation, index):
+        """Progressive mode: a slice was decoded, redraw the axial view if it is the one on screen."""
+        if generation != self.load_generation or self.decoded_slices is None:
+            return
+        self.decoded_slices.add(index)
+        if index == self.axial_index:
+            self.scheduler.mark_dirty("Axial")
+
+    def refresh_partial_views(self):
+        """Progressive mode: the sagittal and coronal views fill in as slices arrive."""
+        self.scheduler.mark_dirty("Sagittal", "Coronal")
+
+    def finish_loading(self):
+        """Stop the loader thread and close the progress dialog."""
+        self.partial_refresh_timer.stop()
+        self.load_thread.quit()
+        self.load_thread.wait()
+        self.load_thread = None
+        self.load_worker = None
+        if self.load_progress is not None:
+            self.load_progress.close()
+            self.load_progress = None
+
+    def cancel_loading(self):
+        """Stop the series being loaded, if any; whatever its worker still sends is ignored."""
+        self.load_generation += 1
+        self.decoded_slices = None
+        if self.load_thread is not None:
+            self.load_worker.cancel()
+            self.finish_loading()
+
+    def on_load_failed(self, generation, message):
+        if generation != self.load_generation:
+            return
+        self.finish_loading()
+        self.decoded_slices = None
+        QMessageBox.critical(self, "Error", message)
+        print(f"Error details: {message}")  # For debugging
+
+    def on_load_finished(self, generation, result):
+        """Build the volume once the worker has decoded every slice."""
+        if generation != self.load_generation:                            #a newer load or volume replaced this one
+            return
+        self.finish_loading()
+        if result is None:                                                #the user cancelled the load
+            self.decoded_slices = None
+            return
+        volume, errors, info = result
+        try:
+            if errors:
+                skipped = "\n".join(f"{file}: {message}" for file, message in errors[:10])
+                QMessageBox.warning(self, "Warning", f"Skipped {len(errors)} file(s):\n{skipped}")
+
+            if self.decoded_slices is not None and volume is self.image_volume:
+                #progressive mode: the volume is already on screen, only the window range needs the real data
+                self.decoded_slices = None
+                self.slab_projectors = {}
+                self.init_window(info, keep_window=info.get("window") is not None)
+                self.update_display()
+                self.start_layout_build()
+            else:
+                self.set_volume(volume, info)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
             print(f"Error details: {str(e)}")  # For debugging
 
+    def set_volume(self, volume, info=None, progressive=False):
+        """Use a new 3D volume, reset the sliders to its middle and show it.
+
+        The volume keeps its stored values; info may give the rescale (slope, intercept)
+        and a default window (center, width) in rescaled units. A series still loading is
+        cancelled, unless progressive says the volume is the one it is filling.
+        """
+        info = info or {}
+        if not progressive:
+            self.cancel_loading()
+        self.prefetcher.invalidate()
+        self.slice_pipeline.cancel()
+        self.stop_layout_build()
+        self.layouts, self.layouts_volume = {}, None
+        self.slab_projectors = {}
+        self.image_volume = volume
+        self.rescale = info.get("rescale") or (1.0, 0.0)
+        row_spacing, column_spacing = info.get("pixel_spacing") or (1.0, 1.0)
+        self.spacing = (info.get("slice_spacing") or 1.0, row_spacing, column_spacing)
+        self.init_window(info)
+
+        # Initialize indices
+        self.axial_index = self.image_volume.shape[0] // 2
+        self.sagittal_index = self.image_volume.shape[1] // 2
+        self.coronal_index = self.image_volume.shape[2] // 2
+        # Update sliders
+        self.axial_slider.setRange(0, self.image_volume.shape[0] - 1)
+        self.sagittal_slider.setRange(0, self.image_volume.shape[1] - 1)
+        self.coronal_slider.setRange(0, self.image_volume.shape[2] - 1)
+        
+        self.axial_slider.setValue(self.axial_index)
+        self.sagittal_slider.setValue(self.sagittal_index)
+        self.coronal_slider.setValue(self.coronal_index)
+
+        # Create volume rendering and show views
+        self.show_views()
+        if not progressive:                                 #a progressive load builds the layouts once it is complete
+            self.start_layout_build()
+
+
+    def init_window(self, info, keep_window=False):
+        """Pick the window (from info or the data) and the range the window sliders can reach."""
+        center, width = default_window(self.image_volume, *self.rescale)
+        if not keep_window:
+            self.window = info.get("window") or (center, width)
+        low, high = center - width / 2, center + width / 2
+        self.value_range = (min(low, self.window[0] - self.window[1] / 2),    #what the window sliders can reach
+                            max(high, self.window[0] + self.window[1] / 2))
+        self.sync_window_sliders()
 
     def show_views(self):
         """Display the axial, sagittal, and coronal views."""
         if self.image_volume is None:
             return
         
-        views = {
-            "Axial": (self.axial_canvas, self.image_volume[self.axial_index, :, :], f"Axial View: Slice {self.axial_index}"),
-            "Sagittal": (self.sagittal_canvas, np.rot90(self.image_volume[:, self.sagittal_index, :], k=2), f"Sagittal View: Slice {self.sagittal_index}"),
-            "Coronal": (self.coronal_canvas, np.flip(self.image_volume[:, :, self.coronal_index], axis=0), f"Coronal View: Slice {self.coronal_index}"),
-        }
-        
-        for key, (canvas, view, title) in views.items():
-            self.prepare_canvas(canvas, view, title)
-        
         # Force update after loading
         self.update_views()
 
 
-    def prepare_canvas(self, canvas, image, title):
-        """Helper method to prepare a canvas with the given image and title."""
-        canvas.figure.clear()
-        ax = canvas.figure.add_subplot(111)
-        ax.imshow(image, cmap='gray', origin='lower' if "Sagittal" in title or "Coronal" in title else 'upper')
-        ax.axis('off')
-        ax.set_title(title)
-        canvas.draw()
+    def prepare_canvas(self, canvas, image, title, crosshair_position=None, grid_shape=None, aspect=1.0):
+        """Helper method to show an image and title on a canvas through its persistent SliceView."""
+        self.slice_views[canvas].show(image, title, crosshair_position, grid_shape, aspect)
 
 
     def upload_folder(self):
@@ -321,60 +604,171 @@ class MedicalImageViewer(QWidget):
         if folder_path:
             self.load_dicom_folder(folder_path)
 
-    def plot_view(self, view, canvas, index, crosshair_position=None):
-        canvas.figure.clear()
-        ax = canvas.figure.add_subplot(111)
-        ax.imshow(view, cmap="gray", aspect='equal')
-        ax.axis('off')
-        ax.set_title(f'Slice: {index}')
-
-        if crosshair_position is not None:
-            ax.axvline(crosshair_position[0], color='red', linestyle='--')
-            ax.axhline(crosshair_position[1], color='red', linestyle='--')
-
-        canvas.draw()
+    @timed("plot_view")
+    def plot_view(self, view, canvas, index, crosshair_position=None, grid_shape=None, aspect=1.0):
+        """Update the image, title and crosshair of one view (set_data + blit, the zoom is kept)."""
+        self.prepare_canvas(canvas, view, f'Slice: {index}', crosshair_position, grid_shape, aspect)
 
     def update_views(self):
-        """Update the axial, sagittal, and coronal views with brightness/contrast adjustments."""
-        views = {
-            "Axial": (self.axial_canvas, self.image_volume[self.axial_index, :, :], self.axial_crosshair),
-            "Sagittal": (self.sagittal_canvas, np.rot90(self.image_volume[:, self.sagittal_index, :], k=2), self.sagittal_crosshair),
-            "Coronal": (self.coronal_canvas, np.flip(self.image_volume[:, :, self.coronal_index], axis=0), self.coronal_crosshair),
-        }
-        
-        brightness = self.brightness_slider.value()
-        contrast = self.contrast_slider.value()
-        
-        for key, (canvas, view, crosshair_position) in views.items():
-            adjusted_view = self.adjust_brightness_contrast(view, brightness, contrast)
-            self.plot_view(adjusted_view, canvas, getattr(self, f"{key.lower()}_index"), crosshair_position)
+        """Mark the axial, sagittal, and coronal views for a redraw (e.g. after brightness/contrast changes)."""
+        self.scheduler.mark_dirty("Axial", "Sagittal", "Coronal")
 
+    def orient_slice(self, volume, key, index):
+        """The 2D slice of one orientation, turned the way it is displayed.
 
-    def adjust_brightness_contrast(self, image, brightness, contrast):
-        image = image.astype(np.float32)
-        image += brightness
+        When contiguous layouts of this volume are ready the slice is one sequential read from them.
+        """
+        if key in self.layouts and self.layouts_volume is volume:
+            return self.layouts[key][index]
+        return oriented_view(volume, key)[index]
+
+    def view_spacing(self, key, spacing=None):
+        """(row, column) spacing in mm of the slices shown in one view."""
+        slice_spacing, row_spacing, column_spacing = spacing or self.spacing
+        return {"Axial": (row_spacing, column_spacing),
+                "Sagittal": (slice_spacing, column_spacing),
+                "Coronal": (slice_spacing, row_spacing)}[key]
+
+    def view_grid(self, key):
+        """(voxel shape, aspect) of one view: the axes stay in voxel units whatever size the image has."""
+        shape = list(self.image_volume.shape)
+        del shape[VIEW_AXES[key]]
+        if not self.spacing_button.isChecked():
+            return tuple(shape), 1.0
+        row_spacing, column_spacing = self.view_spacing(key)
+        return tuple(shape), row_spacing / column_spacing
+
+    def slab_params(self):
+        """(thickness, projector of each view) when thick slabs are on, None for single slices."""
+        thickness = self.slab_slider.value()
+        if thickness <= 1:
+            return None
+        mode = self.slab_mode_box.currentText()
+        for key in VIEW_AXES:
+            projector = self.slab_projectors.get(key)
+            if projector is None or projector.mode != mode:
+                stack = self.layouts[key] if key in self.layouts and self.layouts_volume is self.image_volume \
+                    else oriented_view(self.image_volume, key)
+                self.slab_projectors[key] = SlabProjector(stack, mode)
+        return thickness, dict(self.slab_projectors)
+
+    def display_params(self):
+        """Everything a slice needs to become display-ready, captured on the GUI thread for the prefetcher."""
+        center, width = self.window
+        return (self.image_volume, center, width, *self.rescale,
+                self.brightness_slider.value(), self.contrast_slider.value(),
+                self.spacing if self.spacing_button.isChecked() else None, self.slab_params())
+
+    @timed("prepare_slice")
+    def prepare_slice(self, key, index, params):
+        """Window a slice of stored values to 8-bit and apply brightness/contrast, all in one table lookup.
+
+        Only the displayed (or prefetched) slices ever get converted; moving a slider only swaps the table.
+        With physical spacing on, the 8-bit plane is then resampled to square pixels, so anisotropic
+        sagittal/coronal views are not squashed and the volume itself is never resampled.
+        """
+        volume, center, width, slope, intercept, brightness, contrast, spacing, slab = params
+        if slab is None:
+            data = self.orient_slice(volume, key, index)
+        else:
+            thickness, projectors = slab
+            data = projectors[key].project(index, thickness)
+        image = apply_window(data, center, width, slope, intercept, brightness=brightness, contrast=contrast)
+        if spacing is not None:
+            image = resample_plane(image, self.view_spacing(key, spacing))
+        return image
+
+    @timed("render_views")
+    def render_views(self, keys):
+        """Redraw the given views (called by the scheduler once per frame).
 
-        image = (image - 0) / (255 - 0)
+        Slices prepared ahead of time by the prefetcher are swapped in right away; any other
+        slice is prepared by the worker pipeline and shown by on_slice_prepared, so the GUI
+        thread never extracts, windows or resamples a slice itself.
+        """
+        if self.image_volume is None:
+            self.scheduler.requested_at.clear()                              #nothing to show, no latency to report
+            return
+        loading = self.decoded_slices is not None                            #progressive load still filling the volume
+        if loading:
+            self.slab_projectors = {}                                        #cached sums/blocks would miss the new slices
+        params = self.display_params()
+        for key in keys:
+            index = getattr(self, f"{key.lower()}_index")
+            has_data = not loading or key != "Axial" or index in self.decoded_slices
+            image = None if loading else self.prefetcher.get(key, index)
+            if image is None:
+                self.slice_pipeline.submit(key, index, params, (self.prefetcher.generation, params, loading, has_data))
+            else:
+                self.slice_pipeline.cancel_view(key)                         #an older request must not replace it
+                self.show_slice(key, index, image, params, loading, has_data)
 
-        if contrast != 0:
-            factor = (259 * (contrast + 255)) / (255 * (259 - contrast))
-            image = factor * (image - 0.5) + 0.5
+    def on_slice_prepared(self, key, index, image, request):
+        """A slice prepared by the pipeline arrived on the GUI thread: swap it in unless it is stale."""
+        if not self.slice_pipeline.accept(key, request):
+            return
+        generation, params, loading, has_data = request.context
+        if not loading:
+            self.prefetcher.put(key, index, image, generation)
+        self.show_slice(key, index, image, params, loading, has_data)
+
+    def show_slice(self, key, index, image, params, loading, has_data):
+        """Put a display-ready slice on its canvas, then queue its neighbours in the scroll direction."""
+        self.plot_view(image, self.view_canvases[key], index, getattr(self, f"{key.lower()}_crosshair"),
+                       *self.view_grid(key))
+        latency_ms = self.scheduler.shown(key)                              #from mark_dirty to the slice on screen
+        if latency_ms is not None and recorder.enabled:
+            recorder.record("update_latency", latency_ms)
+        if not loading:
+            self.prefetcher.request(key, index, self.image_volume.shape[VIEW_AXES[key]], params)
+        if (key == "Axial" and has_data and self.time_to_first_image is None and self.load_started is not None):
+            self.time_to_first_image = time.perf_counter() - self.load_started
+
+    def wait_for_views(self, app, timeout=10):
+        """Render the dirty views and process events until their slices are on screen (benchmarks, scripts)."""
+        deadline = time.perf_counter() + timeout
+        self.scheduler.flush()
+        while self.slice_pipeline.busy() and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.0005)
+
+    def update_display(self):
+        """The display mapping changed (brightness/contrast/window): prepared slices are stale."""
+        self.prefetcher.invalidate()
+        self.slice_pipeline.cancel()
+        self.update_views()
 
-        image = np.clip(image, 0, 1)
-        image = (image * 255).astype(np.uint8)
-        return image
+    def sync_window_sliders(self):
+        """Move the window sliders to the current window without triggering a redraw."""
+        low, high = self.value_range
+        span = (high - low) or 1.0
+        center, width = self.window
+        for slider, value in ((self.level_slider, (center - low) / span * 1000),
+                              (self.width_slider, width / span * 1000)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(value)))
+            slider.blockSignals(False)
+
+    def update_window(self):
+        """Read the window from the level/width sliders; the volume itself is never touched."""
+        if self.image_volume is None:
+            return
+        low, high = self.value_range
+        span = (high - low) or 1.0
+        self.window = (low + self.level_slider.value() / 1000 * span, max(self.width_slider.value(), 1) / 1000 * span)
+        self.update_display()
 
     def update_axial_index(self, value):
         self.axial_index = value
-        self.update_views()
+        self.scheduler.mark_dirty("Axial")
 
     def update_sagittal_index(self, value):
         self.sagittal_index = value
-        self.update_views()
+        self.scheduler.mark_dirty("Sagittal")
 
     def update_coronal_index(self, value):
         self.coronal_index =  value
-        self.update_views()
+        self.scheduler.mark_dirty("Coronal")
   
 
     def set_zoom_state(self, zoom_mode=False, zoom_in=False, zoom_out=False):
@@ -506,7 +900,9 @@ class MedicalImageViewer(QWidget):
             self.coronal_crosshair = (x, y)
             self.sagittal_slider.setValue(x)
             self.axial_slider.setValue(y)
-        self.update_views()
+        #the sliders above marked the views whose slice changed, only the crosshair of the clicked view is left
+        self.scheduler.mark_dirty({self.axial_canvas: "Axial", self.sagittal_canvas: "Sagittal",
+                                   self.coronal_canvas: "Coronal"}[event.canvas])
 
     def on_mouse_press(self, event):
         """Handle mouse press events."""
@@ -532,24 +928,168 @@ class MedicalImageViewer(QWidget):
             self.load_nifti_file(file_path)
 
     def load_nifti_file(self, file_path):
-        nifti_img = nib.load(file_path)
-        self.image_volume = nifti_img.get_fdata()
-        self.image_volume = np.transpose(self.image_volume, (2, 0, 1))  # Ensure slices are in the right order
-
-        # Set initial indices and update GUI
-        self.axial_index = self.image_volume.shape[0] // 2
-        self.sagittal_index = self.image_volume.shape[1] // 2
-        self.coronal_index = self.image_volume.shape[2] // 2
-
-        self.axial_slider.setRange(0, self.image_volume.shape[0] - 1)
-        self.sagittal_slider.setRange(0, self.image_volume.shape[1] - 1)
-        self.coronal_slider.setRange(0, self.image_volume.shape[2] - 1)
+        """Open a NIfTI file lazily; only the slices on screen are read from disk (.nii.gz: from the cached copy)."""
+        self.watch_button.setChecked(False)
+        try:
+            volume, info = open_nifti(file_path, cache=self.series_cache)
+            self.set_volume(volume, info)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            print(f"Error details: {str(e)}")  # For debugging
 
-        self.axial_slider.setValue(self.axial_index)
-        self.sagittal_slider.setValue(self.sagittal_index)
-        self.coronal_slider.setValue(self.coronal_index)
+    def toggle_layouts(self, checked):
+        """Turn the contiguous sagittal/coronal layouts on or off."""
+        if checked:
+            self.start_layout_build()
+        else:
+            self.stop_layout_build()
+            self.layouts, self.layouts_volume = {}, None
+            self.prefetcher.invalidate()
+            self.status_label.setText("")
+
+    def start_layout_build(self):
+        """Copy the loaded volume into orientation-contiguous layouts on a background thread."""
+        if (not self.layouts_button.isChecked() or self.image_volume is None or self.layout_thread is not None
+                or self.watch_thread is not None):              #a watched volume keeps growing
+            return
+        self.status_label.setText("Building contiguous sagittal/coronal layouts...")
+        self.layout_thread = QThread(self)
+        self.layout_worker = LayoutBuildWorker(self.image_volume)
+        self.layout_worker.moveToThread(self.layout_thread)
+        self.layout_thread.started.connect(self.layout_worker.run)
+        self.layout_worker.finished.connect(self.on_layouts_built)
+        self.layout_thread.start()
+
+    def stop_layout_build(self):
+        if self.layout_thread is not None:
+            self.layout_worker.cancel()
+            self.layout_thread.quit()
+            self.layout_thread.wait()
+            self.layout_thread = None
+            self.layout_worker = None
+
+    def on_layouts_built(self, volume, layouts):
+        """Swap the layouts in and report how much memory they cost."""
+        self.stop_layout_build()
+        if layouts is None or volume is not self.image_volume:
+            return
+        self.layouts, self.layouts_volume = layouts, volume
+        self.slab_projectors = {}                                            #read slabs from the layouts from now on
+        self.prefetcher.invalidate()
+        report = memory_report(volume, layouts)
+        peak = f"{report['peak_rss_mb']:.0f} MB" if report["peak_rss_mb"] is not None else "n/a"
+        self.status_label.setText(f"Contiguous layouts ready: volume {report['volume_mb']:.0f} MB + "
+                                  f"layouts {report['layouts_mb']:.0f} MB, peak memory {peak}")
+
+    def toggle_watch(self, checked):
+        """Start watching a folder for the slices of a series being written, or stop."""
+        if not checked:
+            self.stop_watch()
+            self.start_layout_build()                           #the volume is final now
+            return
+        folder_path = QFileDialog.getExistingDirectory(self, "Select Folder to Watch")
+        if not folder_path:
+            self.watch_button.setChecked(False)
+            return
+        self.stop_watch()
+        self.watch_volume = None
+        self.watch_thread = QThread(self)
+        self.watch_worker = FolderWatchWorker(folder_path)
+        self.watch_worker.moveToThread(self.watch_thread)
+        self.watch_thread.started.connect(self.watch_worker.run)
+        self.watch_worker.batch.connect(self.on_watch_batch)
+        self.watch_worker.failed.connect(self.on_watch_failed)
+        self.watch_thread.start()
+        self.status_label.setText(f"Watching {folder_path} for new slices...")
+
+    def stop_watch(self):
+        if self.watch_thread is not None:
+            self.watch_worker.cancel()
+            self.watch_thread.quit()
+            self.watch_thread.wait()
+            self.watch_thread = None
+            self.watch_worker = None
+
+    def on_watch_failed(self, message):
+        self.watch_button.setChecked(False)
+        QMessageBox.critical(self, "Error", message)
+        print(f"Error details: {message}")  # For debugging
+
+    def on_watch_batch(self, slices, errors, series):
+        """New slices arrived in the watched folder: insert them at their geometric position.
+
+        Only the new slices were decoded; the views keep showing the same slices, the axial
+        slider just gets longer.
+        """
+        for file, message in errors:
+            print(f"Skipped {file}: {message}")
+        if not slices or self.watch_thread is None:
+            return
+        first = self.watch_volume is None
+        if first:
+            self.watch_volume = GrowingVolume(series["rows"], series["columns"], np.dtype(series["dtype"]))
+        axial_index = self.axial_index or 0
+        for key, pixels in slices:
+            index = self.watch_volume.insert(key, pixels)
+            if not first and index <= axial_index:                #the slice on screen moved one place up
+                axial_index += 1
+        info = watch_info(series, self.watch_volume.locations())
+        if first:
+            self.set_volume(self.watch_volume.volume, info)
+        else:
+            self.grow_volume(self.watch_volume.volume, info, axial_index)
+        skipped = f", {len(errors)} file(s) skipped" if errors else ""
+        self.status_label.setText(f"Watching: {len(self.watch_volume)} slices{skipped}")
+
+    def grow_volume(self, volume, info, axial_index):
+        """Swap in a volume with more slices, keeping the window, zoom and slices on screen."""
+        self.prefetcher.invalidate()
+        self.slice_pipeline.cancel()
+        self.slab_projectors = {}
+        self.image_volume = volume
+        row_spacing, column_spacing = info.get("pixel_spacing") or (1.0, 1.0)
+        self.spacing = (info.get("slice_spacing") or 1.0, row_spacing, column_spacing)
+        self.axial_index = axial_index
+        self.axial_slider.blockSignals(True)                     #the index is set above, no extra render
+        self.axial_slider.setRange(0, volume.shape[0] - 1)
+        self.axial_slider.setValue(axial_index)
+        self.axial_slider.blockSignals(False)
+        self.update_views()
 
-        self.show_views() 
+    def toggle_timings(self, checked):
+        """Start or stop recording hot-path timings; the overlay is shown while they are recorded."""
+        recorder.enabled = checked
+        self.timing_overlay.setVisible(checked)
+        if checked:
+            self.refresh_timing_overlay()
+            self.timing_timer.start()
+        else:
+            self.timing_timer.stop()
+
+    def refresh_timing_overlay(self):
+        """Show the latest, p50 and p95 latency of a view update (mark_dirty to slice on screen) and of canvas draws."""
+        lines = []
+        for name, label in (("update_latency", "update"), ("canvas_blit", "blit"), ("canvas_draw", "draw")):
+            histogram = recorder.get(name)
+            if histogram is not None and histogram.count:
+                lines.append(f"{label}: {histogram.last_ms:6.1f} ms  p50 {histogram.percentile(50):6.1f}  "
+                             f"p95 {histogram.percentile(95):6.1f}")
+        self.timing_overlay.setText("\n".join(lines) or "update: no data yet")
+        self.timing_overlay.adjustSize()
+        self.timing_overlay.move(self.width() - self.timing_overlay.width() - 10, 10)
+        self.timing_overlay.raise_()
+
+    def closeEvent(self, event):
+        """Stop the background workers with the window and save the recorded timings."""
+        self.prefetcher.shutdown()
+        self.slice_pipeline.shutdown()
+        self.cancel_loading()
+        self.stop_watch()
+        self.stop_layout_build()
+        path = recorder.dump()
+        if path is not None:
+            print(f"Timings written to {os.path.abspath(path)}")
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
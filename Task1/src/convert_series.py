@@ -0,0 +1,126 @@
+"""Convert DICOM series folders to NIfTI or .npy volumes without opening the viewer.
+
+Usage:
+    python convert_series.py FOLDER [FOLDER ...] --output OUT_DIR [--format nii.gz|nii|npy]
+                             [--processes 4] [--recursive] [--overwrite]
+
+Every series is decoded in its own worker process. The volumes keep their stored
+dtype and the rescale, window and spacing go into the NIfTI header (or a .json file
+next to the .npy), so the viewer opens the converted files with the same display.
+"""
+import argparse, json, os, sys, time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dicom_loader import list_dicom_files, get_series_index, load_index_volume, volume_info
+
+FORMATS = ("nii.gz", "nii", "npy")
+
+
+def find_series_folders(folders, recursive=False):
+    """The folders that contain .dcm files; with recursive, their subfolders are searched as well."""
+    found = []
+    for folder in folders:
+        walk = os.walk(folder) if recursive else [(folder, None, None)]
+        for path, _, _ in walk:
+            if list_dicom_files(path):
+                found.append(path)
+    return found
+
+
+def output_path(folder, output_dir, fmt):
+    """Output file of a series folder, named after the folder (and its parent, to keep names apart)."""
+    parts = os.path.normpath(os.path.abspath(folder)).split(os.sep)
+    name = "_".join(part for part in parts[-2:] if part)
+    return os.path.join(output_dir, f"{name}.{fmt}")
+
+
+def save_nifti(path, volume, info):
+    """Write a (slices, rows, columns) volume the way open_nifti() reads it back."""
+    import nibabel as nib
+    row_spacing, column_spacing = info.get("pixel_spacing") or (1.0, 1.0)
+    zooms = (row_spacing, column_spacing, info.get("slice_spacing") or 1.0)
+    image = nib.Nifti1Image(np.transpose(volume, (1, 2, 0)), np.diag([*zooms, 1.0]))
+    image.header.set_zooms(zooms)
+    slope, intercept = info["rescale"]
+    image.header.set_slope_inter(slope, intercept)
+    if info.get("window"):
+        center, width = info["window"]
+        image.header["cal_min"], image.header["cal_max"] = center - width / 2, center + width / 2
+    nib.save(image, path)
+
+
+def save_npy(path, volume, info):
+    """Write the volume as .npy and its display metadata as a .json file beside it."""
+    np.save(path, volume)
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump(info, f)
+
+
+def convert_series(folder, output_dir, fmt="nii.gz", slice_workers=1, overwrite=False):
+    """Decode one series folder and write it; runs inside a worker process.
+
+    Returns (folder, output path, slices, seconds, skipped files), output path is None when
+    the output already existed.
+    """
+    path = output_path(folder, output_dir, fmt)
+    if os.path.exists(path) and not overwrite:
+        return folder, None, 0, 0.0, []
+    start = time.perf_counter()
+    index = get_series_index(folder)
+    volume, errors = load_index_volume(folder, index, workers=slice_workers)
+    info = volume_info(index)
+    tmp_path = path + ".tmp" + (".npy" if fmt == "npy" else "." + fmt)     #nibabel picks the format from the suffix
+    if fmt == "npy":
+        save_npy(tmp_path, volume, info)
+        os.replace(os.path.splitext(tmp_path)[0] + ".json", os.path.splitext(path)[0] + ".json")
+    else:
+        save_nifti(tmp_path, volume, info)
+    os.replace(tmp_path, path)                                              #no half-written files after a crash
+    return folder, path, volume.shape[0], time.perf_counter() - start, index["skipped"] + errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folders", nargs="+", help="DICOM series folders")
+    parser.add_argument("--output", required=True, help="directory for the converted volumes")
+    parser.add_argument("--format", choices=FORMATS, default="nii.gz")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="series converted in parallel")
+    parser.add_argument("--slice-workers", type=int, default=1, help="decode threads inside each process")
+    parser.add_argument("--recursive", action="store_true", help="also convert the series in subfolders")
+    parser.add_argument("--overwrite", action="store_true", help="convert series whose output already exists")
+    args = parser.parse_args(argv)
+
+    folders = find_series_folders(args.folders, args.recursive)
+    if not folders:
+        print("No DICOM series found.")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    print(f"Converting {len(folders)} series with {args.processes} process(es) to .{args.format}")
+
+    start = time.perf_counter()
+    total_slices, failures = 0, 0
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = {executor.submit(convert_series, folder, args.output, args.format, args.slice_workers,
+                                   args.overwrite): folder for folder in folders}
+        for future in as_completed(futures):
+            folder = futures[future]
+            try:
+                _, path, slices, seconds, skipped = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED  {folder}: {e}")
+                continue
+            if path is None:
+                print(f"exists  {folder}")
+                continue
+            total_slices += slices
+            note = f", {len(skipped)} file(s) skipped" if skipped else ""
+            print(f"{seconds:7.2f}s {slices:5d} slices {slices / seconds:8.1f} slices/s  {folder} -> {path}{note}")
+    elapsed = time.perf_counter() - start
+    print(f"Total: {total_slices} slices in {elapsed:.2f}s, {total_slices / elapsed:.1f} slices/s, "
+          f"{failures} series failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
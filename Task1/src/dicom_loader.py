@@ -0,0 +1,358 @@
+import os, json, tempfile, pydicom, numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from pydicom.multival import MultiValue
+from timings import timed
+
+INDEX_FILE_NAME = ".series_index.json"      #small file stored next to the series after the first scan
+INDEX_VERSION = 2
+MEMMAP_THRESHOLD = 1 << 30                  #volumes bigger than this (in bytes) are backed by a temporary file
+
+
+def list_dicom_files(folder_path):
+    """Return the paths of all .dcm files inside a folder."""
+    return [os.path.join(folder_path, f) for f in os.listdir(folder_path)
+            if f.endswith(('.dcm', '.DCM'))]
+
+
+def default_workers():
+    """Number of decode workers to use when the caller does not choose one."""
+    return min(8, os.cpu_count() or 1)
+
+
+def rescale_of(dataset):
+    """(slope, intercept) of a dataset, (1.0, 0.0) when it has none."""
+    if hasattr(dataset, 'RescaleSlope') and hasattr(dataset, 'RescaleIntercept'):
+        return float(dataset.RescaleSlope), float(dataset.RescaleIntercept)
+    return 1.0, 0.0
+
+
+@timed("read_slice")
+def read_slice(filepath):
+    """Read and decode a single DICOM slice (the file is opened only once).
+
+    The pixels keep their stored type (int16, uint16, ...); the rescale slope and
+    intercept are left to the caller, see rescale_of().
+    """
+    try:
+        dataset = pydicom.dcmread(filepath)                       #reading the dicom data stored in the file
+        pixel_array = dataset.pixel_array                         #convert the data to a pixel array
+        return pixel_array, dataset
+    except Exception as e:
+        raise Exception(f"Error reading DICOM file {filepath}: {str(e)}")
+
+
+def match_rescale(pixel_array, rescale, target, dtype):
+    """Re-encode stored values written with one rescale so they read right with another one.
+
+    Only needed for the rare series whose slices do not share the same slope/intercept.
+    """
+    if rescale == target:
+        return pixel_array
+    values = pixel_array * rescale[0] + rescale[1]
+    stored = np.rint((values - target[1]) / target[0])
+    info = np.iinfo(dtype) if np.dtype(dtype).kind in "iu" else np.finfo(dtype)
+    return np.clip(stored, info.min, info.max).astype(dtype)
+
+
+def native_dtype(bits_allocated, pixel_representation):
+    """Numpy type of the stored pixel values of a series."""
+    bits = bits_allocated if bits_allocated in (8, 16, 32) else 16
+    return np.dtype(f"{'int' if pixel_representation == 1 else 'uint'}{bits}")
+
+
+def _float_list(value):
+    return [float(v) for v in value] if value is not None else None
+
+
+def _first_float(value):
+    """Window values may hold several windows, the first one is used."""
+    if value is None:
+        return None
+    if isinstance(value, MultiValue):
+        value = value[0] if len(value) else None
+    return float(value) if value is not None else None
+
+
+def read_header(filepath):
+    """Read only the header of a DICOM file (the pixel data is never touched)."""
+    return header_of(pydicom.dcmread(filepath, stop_before_pixels=True), filepath)
+
+
+def header_of(dataset, filepath):
+    """The index fields of a dataset already read from filepath."""
+    stat = os.stat(filepath)
+    return {
+        "name": os.path.basename(filepath),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "series_uid": str(dataset.get("SeriesInstanceUID", "")),
+        "instance": int(dataset.InstanceNumber) if dataset.get("InstanceNumber") is not None else None,
+        "position": _float_list(dataset.get("ImagePositionPatient")),
+        "orientation": _float_list(dataset.get("ImageOrientationPatient")),
+        "rows": int(dataset.get("Rows", 0)),
+        "columns": int(dataset.get("Columns", 0)),
+        "pixel_spacing": _float_list(dataset.get("PixelSpacing")),
+        "slice_thickness": float(dataset.SliceThickness) if dataset.get("SliceThickness") is not None else None,
+        "dtype": native_dtype(int(dataset.get("BitsAllocated", 16)), int(dataset.get("PixelRepresentation", 0))).name,
+        "rescale": list(rescale_of(dataset)),
+        "window_center": _first_float(dataset.get("WindowCenter")),
+        "window_width": _first_float(dataset.get("WindowWidth")),
+    }
+
+
+def slice_location(header):
+    """Distance of a slice along the series normal, or None when the geometry is missing."""
+    position, orientation = header["position"], header["orientation"]
+    if position is None or orientation is None or len(orientation) != 6:
+        return None
+    normal = np.cross(orientation[:3], orientation[3:])
+    return float(np.dot(normal, position))
+
+
+def order_slices(headers):
+    """Sort headers geometrically (ImagePositionPatient along the slice normal),
+    falling back to InstanceNumber and then to the file name."""
+    locations = [slice_location(h) for h in headers]
+    if all(loc is not None for loc in locations):
+        keys = [(loc, h["instance"] or 0, h["name"]) for loc, h in zip(locations, headers)]
+    elif all(h["instance"] is not None for h in headers):
+        keys = [(h["instance"], h["name"]) for h in headers]
+    else:
+        keys = [(h["name"],) for h in headers]
+    order = sorted(range(len(headers)), key=lambda i: keys[i])
+    return [headers[i] for i in order]
+
+
+def scan_series(folder_path, files=None, workers=None, progress=None):
+    """Pre-scan the headers of a folder and build its series index.
+
+    When the folder holds several series the largest one is kept, the other files
+    are listed in the index under "skipped".
+    """
+    files = files if files is not None else list_dicom_files(folder_path)
+    workers = workers or default_workers()
+    headers, skipped = [], []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(read_header, f): f for f in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                headers.append(future.result())
+            except Exception as e:
+                skipped.append((futures[future], str(e)))
+            if progress is not None:
+                progress(done, len(files))
+
+    series = {}
+    for header in headers:
+        series.setdefault(header["series_uid"], []).append(header)
+    if not series:
+        return {"version": INDEX_VERSION, "series_uid": "", "rows": 0, "columns": 0, "dtype": "int16",
+                "rescale": [1.0, 0.0], "window_center": None, "window_width": None, "slices": [], "skipped": skipped}
+    series_uid = max(series, key=lambda uid: len(series[uid]))
+    for uid, others in series.items():
+        if uid != series_uid:
+            skipped += [(os.path.join(folder_path, h["name"]), f"belongs to another series ({uid})") for h in others]
+
+    slices = order_slices(series[series_uid])
+    first = slices[0]
+    locations = [slice_location(h) for h in slices]
+    spacing_between = None
+    if len(slices) > 1 and all(loc is not None for loc in locations):
+        spacing_between = float(np.median(np.abs(np.diff(locations))))
+    return {
+        "version": INDEX_VERSION,
+        "series_uid": series_uid,
+        "rows": first["rows"],
+        "columns": first["columns"],
+        "pixel_spacing": first["pixel_spacing"],
+        "slice_thickness": first["slice_thickness"],
+        "slice_spacing": spacing_between or first["slice_thickness"],
+        "dtype": first["dtype"],
+        "rescale": first["rescale"],
+        "window_center": first["window_center"],
+        "window_width": first["window_width"],
+        "slices": [{key: h[key] for key in ("name", "size", "mtime", "instance", "position")} for h in slices],
+        "skipped": skipped,
+    }
+
+
+def index_path(folder_path):
+    return os.path.join(folder_path, INDEX_FILE_NAME)
+
+
+def load_series_index(folder_path, files=None):
+    """Return the saved index of a folder, or None if it is missing or out of date.
+
+    The index is still valid when the folder holds exactly the same files, with the
+    same sizes and modification times, as when it was written.
+    """
+    try:
+        with open(index_path(folder_path)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+
+    files = files if files is not None else list_dicom_files(folder_path)
+    known = {entry["name"]: entry for entry in index["slices"]}
+    known.update({os.path.basename(path): None for path, _ in index.get("skipped", [])})
+    if len(files) != len(known):
+        return None
+    for path in files:
+        name = os.path.basename(path)
+        if name not in known:
+            return None
+        entry = known[name]
+        if entry is not None:
+            stat = os.stat(path)
+            if stat.st_size != entry["size"] or stat.st_mtime != entry["mtime"]:
+                return None
+    return index
+
+
+def save_series_index(folder_path, index):
+    """Write the index next to the series; read-only folders are silently skipped."""
+    try:
+        with open(index_path(folder_path), "w") as f:
+            json.dump(index, f)
+    except OSError:
+        pass
+
+
+def get_series_index(folder_path, files=None, workers=None, progress=None):
+    """Return the series index of a folder, scanning the headers only when needed."""
+    files = files if files is not None else list_dicom_files(folder_path)
+    index = load_series_index(folder_path, files)
+    if index is None:
+        index = scan_series(folder_path, files, workers, progress)
+        save_series_index(folder_path, index)
+    return index
+
+
+def index_files(folder_path, index):
+    """Paths of the slices of an index, in volume order."""
+    return [os.path.join(folder_path, entry["name"]) for entry in index["slices"]]
+
+
+def allocate_volume(shape, dtype, memmap_threshold=MEMMAP_THRESHOLD, memmap_dir=None):
+    """Preallocate one contiguous volume, as a np.memmap on a temporary file when it is large.
+
+    The temporary file has no name on disk and disappears together with the array.
+    """
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if memmap_threshold is None or nbytes < memmap_threshold:
+        return np.zeros(shape, dtype=dtype)
+    backing = tempfile.TemporaryFile(dir=memmap_dir)
+    return np.memmap(backing, dtype=dtype, mode="w+", shape=shape)
+
+
+def _read_pixels(filepath, rescale, dtype):
+    """Pool task: decode one file and only send the pixels back (datasets are heavy to pickle)."""
+    pixel_array, dataset = read_slice(filepath)
+    return match_rescale(pixel_array, rescale_of(dataset), rescale, dtype)
+
+
+def _place_slice(volume, i, pixel_array, filepath):
+    if pixel_array.shape != volume.shape[1:]:
+        raise Exception(f"Slice {filepath} has shape {pixel_array.shape}, expected {volume.shape[1:]}")
+    volume[i] = pixel_array
+
+
+def _decode_into(volume, i, filepath, rescale):
+    """Pool task: decode one file and write it straight into its place in the volume."""
+    _place_slice(volume, i, _read_pixels(filepath, rescale, volume.dtype), filepath)
+
+
+def middle_out(count):
+    """Slice numbers from the center of the volume outwards: c, c+1, c-1, c+2, ..."""
+    center = count // 2
+    order = [center]
+    for offset in range(1, count):
+        for i in (center + offset, center - offset):
+            if 0 <= i < count:
+                order.append(i)
+    return order[:count]
+
+
+def load_series(files, shape, dtype=np.int16, rescale=(1.0, 0.0), workers=None, use_processes=False, progress=None,
+                cancel=None, memmap_threshold=MEMMAP_THRESHOLD, volume=None, center_first=False, on_slice=None):
+    """Decode a list of DICOM files in parallel into one preallocated volume.
+
+    Args:
+        files: Paths of the slices, in the order they should appear in the volume.
+        shape: (rows, columns) of a slice, usually taken from the series index.
+        dtype (optional): Type of the volume, normally the stored type of the series.
+        rescale (optional): (slope, intercept) the stored values of the volume are read with.
+        workers (optional): Size of the pool, defaults to default_workers().
+        use_processes (optional): Use a process pool instead of a thread pool.
+        progress (optional): Called as progress(done, total) after every decoded file.
+        cancel (optional): Called between files, loading stops when it returns True.
+        memmap_threshold (optional): Size in bytes above which the volume is a np.memmap.
+        volume (optional): A volume from allocate_volume() to decode into, so the caller can show it while it fills.
+        center_first (optional): Decode from the center slice outwards (see middle_out()).
+        on_slice (optional): Called as on_slice(i) once slice i is in the volume.
+
+    Returns:
+        (volume, errors) where volume holds the stored (not rescaled) values, one slice per file (slices that could not
+        be decoded are left black) and errors is a list of (file, message) pairs,
+        or None if the load was cancelled.
+    """
+    workers = workers or default_workers()
+    total = len(files)
+    if volume is None:
+        volume = allocate_volume((total,) + tuple(shape), dtype, memmap_threshold)
+    order = middle_out(total) if center_first else range(total)
+    errors = []
+
+    #threads write their slice directly into the volume, processes send it back to be copied into place
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        submit = lambda i, f: executor.submit(_read_pixels, f, rescale, volume.dtype)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit = lambda i, f: executor.submit(_decode_into, volume, i, f, rescale)
+    try:
+        futures = {submit(i, files[i]): i for i in order}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                pixel_array = future.result()
+                if use_processes:
+                    _place_slice(volume, i, pixel_array, files[i])
+                if on_slice is not None:
+                    on_slice(i)
+            except Exception as e:
+                errors.append((files[i], str(e)))
+            if progress is not None:
+                progress(done, total)
+            if cancel is not None and cancel():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return None
+    finally:
+        executor.shutdown(wait=True)
+
+    if len(errors) == total:
+        raise Exception("No valid DICOM slices could be loaded.")
+    return volume, errors
+
+
+def allocate_index_volume(index, memmap_threshold=MEMMAP_THRESHOLD):
+    """Empty volume with the shape and stored type of an indexed series."""
+    return allocate_volume((len(index["slices"]), index["rows"], index["columns"]), index["dtype"], memmap_threshold)
+
+
+def load_index_volume(folder_path, index, **kwargs):
+    """Decode the series described by an index; extra arguments go to load_series()."""
+    return load_series(index_files(folder_path, index), (index["rows"], index["columns"]),
+                       dtype=index["dtype"], rescale=tuple(index["rescale"]), **kwargs)
+
+
+def volume_info(index):
+    """Display metadata of an indexed series (rescale and default window)."""
+    return {
+        "rescale": tuple(index["rescale"]),
+        "window": (index["window_center"], index["window_width"]) if index["window_width"] else None,
+        "pixel_spacing": index.get("pixel_spacing"),
+        "slice_spacing": index.get("slice_spacing"),
+    }
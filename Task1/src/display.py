@@ -0,0 +1,78 @@
+import numpy as np
+from functools import lru_cache
+from timings import timed
+
+
+@lru_cache(maxsize=16)
+def window_lut(dtype_name, center, width, slope=1.0, intercept=0.0):
+    """Precompute the 8-bit display value of every possible stored value.
+
+    Args:
+        dtype_name: Name of an 8 or 16 bit integer type ("int16", "uint16", "uint8", ...).
+        center, width: The window, in rescaled units (HU for CT).
+        slope, intercept: Rescale that turns stored values into rescaled ones.
+
+    Returns:
+        A 256 or 65536 entry uint8 table indexed by the stored values seen as unsigned integers.
+    """
+    dtype = np.dtype(dtype_name)
+    unsigned = np.dtype(f"uint{dtype.itemsize * 8}")
+    stored = np.arange(2 ** (dtype.itemsize * 8), dtype=unsigned).view(dtype)    #every bit pattern, in index order
+    return _window(stored * slope + intercept, center, width)
+
+
+def _window(values, center, width):
+    low = center - width / 2.0
+    scale = 255.0 / max(width, 1e-12)
+    return np.clip((values - low) * scale + 0.5, 0, 255).astype(np.uint8)
+
+
+def lut_supported(dtype):
+    dtype = np.dtype(dtype)
+    return dtype.kind in "iu" and dtype.itemsize <= 2
+
+
+@lru_cache(maxsize=64)
+def brightness_contrast_lut(brightness, contrast):
+    """256-entry table applying the brightness/contrast sliders to an 8-bit image."""
+    image = np.arange(256, dtype=np.float32) + brightness
+    image = image / 255
+    if contrast != 0:
+        factor = (259 * (contrast + 255)) / (255 * (259 - contrast))
+        image = factor * (image - 0.5) + 0.5
+    return (np.clip(image, 0, 1) * 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=16)
+def display_lut(dtype_name, center, width, slope=1.0, intercept=0.0, brightness=0, contrast=0):
+    """Window and brightness/contrast folded into one table, so a slice costs a single gather."""
+    return brightness_contrast_lut(brightness, contrast)[window_lut(dtype_name, center, width, slope, intercept)]
+
+
+@timed("apply_window")
+def apply_window(image, center, width, slope=1.0, intercept=0.0, brightness=0, contrast=0):
+    """Map a 2D slice of stored values to 8-bit with a window/level and brightness/contrast.
+
+    Integer slices go through the cached lookup table (one gather), other types
+    (float NIfTI data) are windowed directly and then go through the 256-entry
+    brightness/contrast table.
+    """
+    if lut_supported(image.dtype):
+        lut = display_lut(image.dtype.name, float(center), float(width), float(slope), float(intercept),
+                          int(brightness), int(contrast))
+        return lut[image.view(image.dtype.str.replace("i", "u"))]    #same bytes and byte order, read as unsigned
+    windowed = _window(image * slope + intercept if (slope, intercept) != (1.0, 0.0) else image, center, width)
+    if brightness == 0 and contrast == 0:
+        return windowed
+    return brightness_contrast_lut(int(brightness), int(contrast))[windowed]
+
+
+def default_window(volume, slope=1.0, intercept=0.0, samples=16):
+    """A window covering the whole value range, estimated from a few evenly spread slices."""
+    step = max(1, volume.shape[0] // samples)
+    sample = volume[::step]
+    low = float(sample.min()) * slope + intercept
+    high = float(sample.max()) * slope + intercept
+    if slope < 0:
+        low, high = high, low
+    return (low + high) / 2.0, (high - low) or 1.0
@@ -0,0 +1,133 @@
+import os, bisect, numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dicom_loader import (list_dicom_files, read_slice, header_of, slice_location, rescale_of, match_rescale,
+                          default_workers)
+
+INITIAL_CAPACITY = 64                       #slices allocated before the first growth of a watched volume
+
+
+class GrowingVolume:
+    """A (slices, rows, columns) volume that slices are inserted into at their geometric position.
+
+    The slices live in a buffer with spare room that doubles when it is full, so adding
+    a slice at the end costs one slice copy (amortised). A slice that arrives out of order
+    only moves the slices after it; nothing that is already there gets decoded again.
+    """
+
+    def __init__(self, rows, columns, dtype, capacity=INITIAL_CAPACITY):
+        self.buffer = np.zeros((capacity, rows, columns), dtype=dtype)
+        self.keys = []                                        #sorted ordering keys of the stored slices
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def volume(self):
+        """View on the slices stored so far (a new view after every insert)."""
+        return self.buffer[:len(self.keys)]
+
+    def insert(self, key, pixels):
+        """Insert a slice at the place of its key; returns its index."""
+        count = len(self.keys)
+        if pixels.shape != self.buffer.shape[1:]:
+            raise Exception(f"Slice has shape {pixels.shape}, expected {self.buffer.shape[1:]}")
+        if count == self.buffer.shape[0]:
+            grown = np.empty((2 * count,) + self.buffer.shape[1:], dtype=self.buffer.dtype)
+            grown[:count] = self.buffer[:count]
+            self.buffer = grown
+        index = bisect.bisect_left(self.keys, key)
+        if index < count:
+            self.buffer[index + 1:count + 1] = self.buffer[index:count]     #memmove of the slices after it
+        self.buffer[index] = pixels
+        self.keys.insert(index, key)
+        return index
+
+    def locations(self):
+        return [key[0] for key in self.keys]
+
+
+def slice_key(header):
+    """Ordering key of a slice: its position along the normal, then InstanceNumber and file name."""
+    location = slice_location(header)
+    instance = header["instance"] or 0
+    return (location if location is not None else float(instance), instance, header["name"])
+
+
+class FolderWatcher:
+    """Finds and decodes the DICOM files that arrived in a folder since the last poll.
+
+    A file is only read once its size and mtime did not change between two polls, since
+    the scanner may still be writing it. The first slice fixes the series, its stored
+    type and its rescale; files of other series are reported and then ignored.
+    """
+
+    def __init__(self, folder_path, workers=None):
+        self.folder_path = folder_path
+        self.workers = workers or default_workers()
+        self.seen = set()                                     #files read (or rejected) already
+        self.pending = {}                                     #file -> (size, mtime) at the previous poll
+        self.series = None                                    #header of the first accepted slice
+
+    def stable_files(self):
+        """New files whose size and mtime are the same as at the previous poll."""
+        ready = []
+        for filepath in list_dicom_files(self.folder_path):
+            if filepath in self.seen:
+                continue
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime)
+            if self.pending.get(filepath) == signature:
+                ready.append(filepath)
+                del self.pending[filepath]
+            else:
+                self.pending[filepath] = signature
+        return ready
+
+    def _read(self, filepath):
+        pixel_array, dataset = read_slice(filepath)
+        header = header_of(dataset, filepath)
+        header["pixel_array"], header["file_rescale"] = pixel_array, rescale_of(dataset)
+        return header
+
+    def poll(self):
+        """Decode the new stable files; returns (slices as [(key, pixels)], errors as [(file, message)])."""
+        files = self.stable_files()
+        if not files:
+            return [], []
+        self.seen.update(files)
+        slices, errors = [], []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(files))) as executor:
+            futures = {filepath: executor.submit(self._read, filepath) for filepath in files}
+        for filepath, future in futures.items():
+            try:
+                header = future.result()
+            except Exception as e:
+                errors.append((filepath, str(e)))
+                continue
+            if self.series is None:
+                self.series = {key: value for key, value in header.items() if key != "pixel_array"}
+            if header["series_uid"] != self.series["series_uid"]:
+                errors.append((filepath, f"belongs to another series ({header['series_uid']})"))
+                continue
+            if header["pixel_array"].shape != (self.series["rows"], self.series["columns"]):
+                errors.append((filepath, f"has shape {header['pixel_array'].shape}, expected "
+                                         f"{(self.series['rows'], self.series['columns'])}"))
+                continue
+            pixels = match_rescale(header["pixel_array"], header["file_rescale"], tuple(self.series["rescale"]),
+                                   np.dtype(self.series["dtype"]))
+            slices.append((slice_key(header), pixels))
+        return slices, errors
+
+
+def watch_info(series, locations):
+    """Display metadata of a watched series (like volume_info() of an indexed one) from its first header."""
+    slice_spacing = float(np.median(np.abs(np.diff(locations)))) if len(locations) > 1 else None
+    return {
+        "rescale": tuple(series["rescale"]),
+        "window": (series["window_center"], series["window_width"]) if series["window_width"] else None,
+        "pixel_spacing": series["pixel_spacing"],
+        "slice_spacing": slice_spacing or series["slice_thickness"],
+    }
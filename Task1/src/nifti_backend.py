@@ -0,0 +1,70 @@
+import numpy as np, nibabel as nib
+from concurrent.futures import ThreadPoolExecutor
+
+cache_writer = ThreadPoolExecutor(max_workers=1)            #writes cached copies off the GUI thread, one at a time
+
+
+def write_cache_copy(cache, key, volume, info, file_path):
+    """Store the decompressed voxels of a .nii.gz; a failed write only means the next open decompresses again."""
+    try:
+        cache.put_entry(key, volume, [], info, file_path)   #stored (slices, rows, columns)-contiguous
+    except OSError as e:
+        print(f"Could not cache {file_path}: {e}")
+
+
+def open_nifti(file_path, cache=None):
+    """Open a NIfTI file without materializing it as floats.
+
+    The voxels stay in their stored type: uncompressed .nii files are memory-mapped,
+    so nothing is read until a slice is displayed, while .nii.gz files are decompressed
+    once in their stored type. The scaling (scl_slope/scl_inter) is returned as metadata
+    and applied by the display path on the slices that are shown.
+
+    With a SeriesCache, the decompressed voxels of a .nii.gz are kept on disk (keyed by
+    the path, size and mtime of the file), so opening it again is a memmap of the cached
+    copy and skips the decompression entirely. The copy is written by cache_writer in the
+    background; the volume is returned from memory right away.
+
+    Returns:
+        (volume, info) where volume is a (slices, rows, columns) view on the stored data
+        (axial slices first, like the DICOM volumes) and info holds the rescale, a
+        default window and the voxel spacing.
+    """
+    compressed = file_path.endswith(".gz") and cache is not None and cache.enabled
+    if compressed:
+        key = cache.file_key(file_path)
+        cached = cache.get_entry(key)
+        if cached is not None:
+            volume, _, info = cached
+            return volume, info
+
+    nifti_img = nib.load(file_path, mmap=True)
+    proxy = nifti_img.dataobj
+    if nib.is_proxy(proxy):
+        data = proxy.get_unscaled()                         #a np.memmap for uncompressed files
+        slope, intercept = float(proxy.slope), float(proxy.inter)
+    else:
+        data = np.asanyarray(proxy)
+        slope, intercept = 1.0, 0.0
+    while data.ndim > 3:                                    #4D series: show the first volume
+        data = data[..., 0]
+    if data.ndim != 3:
+        raise Exception(f"Expected a 3D NIfTI image, got shape {data.shape}.")
+
+    volume = np.transpose(data, (2, 0, 1))                  #only the strides change, the data is not copied
+
+    header = nifti_img.header
+    zooms = [float(z) for z in header.get_zooms()[:3]]
+    window = None
+    cal_min, cal_max = float(header.get("cal_min", 0)), float(header.get("cal_max", 0))
+    if cal_max > cal_min:
+        window = ((cal_min + cal_max) / 2, cal_max - cal_min)
+    info = {
+        "rescale": (slope, intercept),
+        "window": window,
+        "pixel_spacing": zooms[:2],
+        "slice_spacing": zooms[2],
+    }
+    if compressed:
+        cache_writer.submit(write_cache_copy, cache, key, volume, info, file_path)
+    return volume, info
@@ -0,0 +1,110 @@
+import numpy as np
+from functools import lru_cache
+
+MAX_PLANE_SIZE = 1024                       #resampled planes are never larger than this on either side
+
+
+def physical_shape(shape, spacing, max_size=MAX_PLANE_SIZE):
+    """Size a plane needs so that its pixels are square, given (row, column) spacing in mm."""
+    rows, columns = shape
+    height, width = rows * spacing[0], columns * spacing[1]
+    step = max(min(spacing), max(height, width) / max_size)
+    return max(1, int(round(height / step))), max(1, int(round(width / step)))
+
+
+@lru_cache(maxsize=64)
+def _axis_grid(size_in, size_out):
+    """Source positions of the output samples along one axis: (lower index, upper index, weight)."""
+    position = (np.arange(size_out) + 0.5) * size_in / size_out - 0.5
+    position = np.clip(position, 0, size_in - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, size_in - 1)
+    return lower, upper, (position - lower).astype(np.float32)
+
+
+def _from_float(values, dtype):
+    if np.dtype(dtype).kind in "iu":
+        info = np.iinfo(dtype)
+        return np.clip(np.rint(values), info.min, info.max).astype(dtype)
+    return values.astype(dtype)
+
+
+def resample_plane(image, spacing, max_size=MAX_PLANE_SIZE, order=1):
+    """Resample a 2D plane to square pixels.
+
+    Args:
+        image: The plane.
+        spacing: (row spacing, column spacing) in mm.
+        max_size (optional): Largest side of the result, to keep reslicing cheap.
+        order (optional): 0 for nearest neighbour, 1 for (separable) linear interpolation.
+
+    The sampling grids only depend on the input and output sizes and are cached, so
+    reslicing while a slider moves is a couple of gathers and blends.
+    """
+    out_shape = physical_shape(image.shape, spacing, max_size)
+    if out_shape == image.shape:
+        return image
+    rows_low, rows_high, rows_weight = _axis_grid(image.shape[0], out_shape[0])
+    columns_low, columns_high, columns_weight = _axis_grid(image.shape[1], out_shape[1])
+    if order == 0:
+        rows = np.where(rows_weight < 0.5, rows_low, rows_high)
+        columns = np.where(columns_weight < 0.5, columns_low, columns_high)
+        return image[rows[:, None], columns[None, :]]
+
+    top = image[rows_low].astype(np.float32)
+    blended = top + (image[rows_high] - top) * rows_weight[:, None]
+    left = blended[:, columns_low]
+    blended = left + (blended[:, columns_high] - left) * columns_weight[None, :]
+    return _from_float(blended, image.dtype)
+
+
+@lru_cache(maxsize=16)
+def _plane_offsets(shape, u, v):
+    """Voxel offsets of every pixel of an oblique plane from its center, shape (3, rows, columns)."""
+    rows, columns = shape
+    i = (np.arange(rows, dtype=np.float32) - (rows - 1) / 2)[:, None]
+    j = (np.arange(columns, dtype=np.float32) - (columns - 1) / 2)[None, :]
+    return np.stack([i * v[axis] + j * u[axis] for axis in range(3)])
+
+
+def sample_oblique(volume, center, u, v, shape=(256, 256), voxel_spacing=(1.0, 1.0, 1.0), step=None,
+                   order=1, fill=0):
+    """Sample an arbitrary plane through a (slices, rows, columns) volume.
+
+    Args:
+        center: Center of the plane in voxel indices (slice, row, column).
+        u, v: Directions of the plane's columns and rows, in physical (z, y, x) space.
+        shape (optional): (rows, columns) of the output plane.
+        voxel_spacing (optional): (slice, row, column) spacing in mm.
+        step (optional): Pixel size of the output in mm, the smallest voxel spacing by default.
+        order (optional): 0 for nearest neighbour, 1 for trilinear interpolation.
+        fill (optional): Value of the pixels that fall outside the volume.
+    """
+    spacing = np.asarray(voxel_spacing, dtype=np.float64)
+    step = step or float(spacing.min())
+    u = np.asarray(u, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    u_voxels = tuple(u / np.linalg.norm(u) * step / spacing)          #one output pixel, in voxels
+    v_voxels = tuple(v / np.linalg.norm(v) * step / spacing)
+    coords = _plane_offsets(tuple(shape), u_voxels, v_voxels) + np.asarray(center, dtype=np.float32)[:, None, None]
+
+    limits = np.array(volume.shape)[:, None, None] - 1
+    inside = np.all((coords >= 0) & (coords <= limits), axis=0)
+    if order == 0:
+        index = np.clip(np.rint(coords), 0, limits).astype(np.intp)
+        plane = volume[index[0], index[1], index[2]]
+    else:
+        lower = np.clip(np.floor(coords), 0, limits).astype(np.intp)
+        upper = np.minimum(lower + 1, limits)
+        weight = (coords - lower).astype(np.float32)
+        plane = np.zeros(shape, dtype=np.float32)
+        for dz in (0, 1):
+            z, wz = (upper[0], weight[0]) if dz else (lower[0], 1 - weight[0])
+            for dy in (0, 1):
+                y, wy = (upper[1], weight[1]) if dy else (lower[1], 1 - weight[1])
+                for dx in (0, 1):
+                    x, wx = (upper[2], weight[2]) if dx else (lower[2], 1 - weight[2])
+                    plane += volume[z, y, x] * (wz * wy * wx)
+        plane = _from_float(plane, volume.dtype)
+    plane[~inside] = fill
+    return plane
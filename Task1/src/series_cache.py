@@ -0,0 +1,126 @@
+import os, json, hashlib, numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "medical_image_viewer", "series")
+DEFAULT_BUDGET_MB = 4096
+
+
+class SeriesCache:
+    """On-disk cache of decoded DICOM volumes (and decompressed .nii.gz files) with least-recently-used eviction.
+
+    Every entry is a .npy file (opened again as a read-only memmap, so a hit costs
+    almost nothing) and a small .json file with the display metadata. The .json
+    modification time records the last use of the entry.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, budget_bytes=DEFAULT_BUDGET_MB << 20):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+
+    @classmethod
+    def from_environment(cls):
+        """Cache configured by TASK1_CACHE_DIR and TASK1_CACHE_BUDGET_MB (0 disables it)."""
+        directory = os.environ.get("TASK1_CACHE_DIR", DEFAULT_CACHE_DIR)
+        budget_mb = int(os.environ.get("TASK1_CACHE_BUDGET_MB", DEFAULT_BUDGET_MB))
+        return cls(directory, budget_mb << 20)
+
+    @property
+    def enabled(self):
+        return self.budget_bytes > 0
+
+    @staticmethod
+    def key(index):
+        """Cache key of a series: its SeriesInstanceUID plus the names, sizes and mtimes of its files."""
+        digest = hashlib.sha1(index["series_uid"].encode())
+        for entry in index["slices"]:
+            digest.update(f"|{entry['name']}|{entry['size']}|{entry['mtime']!r}".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_key(file_path):
+        """Cache key of a single file (e.g. a .nii.gz): its absolute path, size and mtime."""
+        stat = os.stat(file_path)
+        return hashlib.sha1(f"file|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime!r}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def get(self, index):
+        """Return (volume, errors, info) for a cached series, or None on a miss."""
+        return self.get_entry(self.key(index))
+
+    def get_entry(self, key):
+        """Return (volume, errors, info) stored under a key, or None on a miss."""
+        if not self.enabled:
+            return None
+        volume_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            volume = np.load(volume_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(meta_path)                                         #mark the entry as recently used
+        except OSError:                                                 #e.g. a read-only cache directory
+            pass
+        info = meta["info"]
+        info["rescale"] = tuple(info["rescale"])
+        info["window"] = tuple(info["window"]) if info["window"] else None
+        return volume, [tuple(error) for error in meta["errors"]], info
+
+    def put(self, index, volume, errors, info):
+        """Store a decoded series, then evict old entries until the cache fits its budget."""
+        self.put_entry(self.key(index), volume, errors, info, index["series_uid"])
+
+    def put_entry(self, key, volume, errors, info, source):
+        """Store a volume under a key (source names what it came from), then evict old entries."""
+        if not self.enabled or volume.nbytes > self.budget_bytes:
+            return
+        volume_path, meta_path = self._paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            #write under temporary names first so a crash never leaves a half-written entry behind
+            with open(volume_path + ".tmp", "wb") as f:
+                np.save(f, volume)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({"source": source, "errors": errors, "info": info}, f)
+            os.replace(volume_path + ".tmp", volume_path)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError:
+            for path in (volume_path + ".tmp", meta_path + ".tmp"):   #e.g. the disk filled up halfway
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return
+        self.evict()
+
+    def entries(self):
+        """(last use, size in bytes, key) of every complete entry, oldest first."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            volume_path, meta_path = self._paths(name[:-len(".json")])
+            try:
+                entries.append((os.path.getmtime(meta_path), os.path.getsize(volume_path), name[:-len(".json")]))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def evict(self):
+        """Remove the least recently used entries until the total size fits the budget."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.budget_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
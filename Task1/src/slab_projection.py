@@ -0,0 +1,110 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+
+SLAB_MODES = ("MIP", "MinIP", "Average")
+BLOCK_SIZE = 8                              #slices summarised by one cached MIP/MinIP block
+BLOCK_CAPACITY = 64                         #cached blocks per projector
+
+
+def slab_range(index, thickness, count):
+    """Slices [start, stop) of a slab of the given thickness centred on index, clipped to the stack."""
+    start = max(0, index - thickness // 2)
+    stop = min(count, start + thickness)
+    return max(0, stop - thickness), stop
+
+
+class SlabProjector:
+    """Thick-slab projections along the first axis of one stack of slices.
+
+    The stack is an oriented view (or a contiguous layout) of the volume, so slab i is
+    drawn like slice i. Moving the slab by a slice does not recompute it:
+        - Average keeps a running sum of the current slab and only adds the slice that
+          enters and subtracts the one that leaves.
+        - MIP/MinIP combine cached per-block maxima/minima of BLOCK_SIZE aligned slices
+          with the few loose slices at the edges of the slab.
+    The result keeps the stored dtype of the volume so it is windowed like a single slice.
+    Projectors are used from the prefetcher threads as well, so every call holds a lock.
+    """
+
+    def __init__(self, stack, mode, block_size=BLOCK_SIZE, block_capacity=BLOCK_CAPACITY):
+        if mode not in SLAB_MODES:
+            raise ValueError(f"Unknown slab mode: {mode}")
+        self.stack = stack
+        self.mode = mode
+        self.block_size = block_size
+        self.block_capacity = block_capacity
+        self.reduce = np.maximum if mode == "MIP" else np.minimum
+        self.lock = threading.Lock()
+        self.blocks = OrderedDict()
+        self.sum = None                                   #running sum of stack[sum_range[0]:sum_range[1]]
+        self.sum_range = (0, 0)
+        self.counters = {"slices_read": 0, "block_hits": 0, "block_misses": 0}
+
+    def project(self, index, thickness):
+        """The slab of the given thickness (in slices) centred on slice index."""
+        start, stop = slab_range(index, thickness, self.stack.shape[0])
+        with self.lock:
+            if self.mode == "Average":
+                return self._average(start, stop)
+            return self._extreme(start, stop)
+
+    def _read(self, index):
+        self.counters["slices_read"] += 1
+        return self.stack[index]
+
+    def _average(self, start, stop):
+        if self.sum is None:
+            accumulator = np.float64 if self.stack.dtype.kind == "f" else np.int64
+            self.sum = np.zeros(self.stack.shape[1:], dtype=accumulator)
+        low, high = self.sum_range
+        if start >= high or stop <= low or (stop - start) < abs(start - low) + abs(stop - high):
+            #no overlap with the previous slab (or less work to start again): sum from scratch
+            self.sum[...] = 0
+            low = high = start
+        for i in range(start, low):                   #slices entering at the front
+            self.sum += self._read(i)
+        for i in range(low, start):                   #slices leaving at the front
+            self.sum -= self._read(i)
+        for i in range(high, stop):                   #slices entering at the back
+            self.sum += self._read(i)
+        for i in range(stop, high):                   #slices leaving at the back
+            self.sum -= self._read(i)
+        self.sum_range = (start, stop)
+        mean = self.sum / (stop - start)
+        if self.stack.dtype.kind in "iu":
+            return np.rint(mean).astype(self.stack.dtype)
+        return mean.astype(self.stack.dtype)
+
+    def _block(self, block):
+        """Maximum/minimum of the aligned slices [block * size, (block + 1) * size), cached."""
+        result = self.blocks.get(block)
+        if result is not None:
+            self.blocks.move_to_end(block)
+            self.counters["block_hits"] += 1
+            return result
+        self.counters["block_misses"] += 1
+        start = block * self.block_size
+        stop = min(start + self.block_size, self.stack.shape[0])
+        result = self._read(start).copy()
+        for i in range(start + 1, stop):
+            self.reduce(result, self._read(i), out=result)
+        self.blocks[block] = result
+        if len(self.blocks) > self.block_capacity:
+            self.blocks.popitem(last=False)
+        return result
+
+    def _extreme(self, start, stop):
+        first_block = -(-start // self.block_size)                    #first block fully inside the slab
+        last_block = stop // self.block_size                          #one past the last full block
+        if first_block < last_block:
+            parts = [self._block(block) for block in range(first_block, last_block)]
+            loose = list(range(start, first_block * self.block_size)) + list(range(last_block * self.block_size, stop))
+        else:
+            parts, loose = [], list(range(start, stop))
+        for i in loose:
+            parts.append(self._read(i))
+        result = parts[0].copy()
+        for part in parts[1:]:
+            self.reduce(result, part, out=result)
+        return result
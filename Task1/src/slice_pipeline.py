@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class SliceRequest:
+    """One request of a view; compared by identity, context is handed back with the image."""
+    __slots__ = ("number", "context")
+
+    def __init__(self, number, context):
+        self.number = number
+        self.context = context
+
+
+class SlicePipeline(QObject):
+    """Prepares the slices the views ask for on worker threads, newest request wins.
+
+    Every view has at most one live request: submitting a new one cancels the previous
+    one if it has not started, and a request that finishes after a newer one was made
+    is dropped instead of shown. Finished buffers come back to the GUI thread through
+    the ready signal, so the GUI thread only swaps them into the canvas.
+    """
+
+    ready = pyqtSignal(str, int, object, object)          #view, slice index, display-ready image, request
+
+    def __init__(self, prepare, workers=3):
+        super().__init__()
+        self.prepare = prepare                                #prepare(view, index, params) -> 8-bit slice
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.latest = {}                                      #view -> its live request
+        self.futures = {}
+        self.in_flight = set()                                #requests submitted but not delivered or dropped
+        self.next_id = 0
+        self.counters = {"submitted": 0, "cancelled": 0, "stale": 0, "delivered": 0}
+
+    def submit(self, view, index, params, context=None):
+        """Ask for a slice of a view; context is handed back with the image (e.g. a prefetch generation)."""
+        with self.lock:
+            self.next_id += 1
+            request = SliceRequest(self.next_id, context)
+            self._cancel_view(view)
+            self.latest[view] = request
+            self.in_flight.add(request)
+            self.counters["submitted"] += 1
+            self.futures[view] = self.executor.submit(self._run, view, index, params, request)
+
+    def cancel_view(self, view):
+        """Forget the live request of a view (e.g. the view was just drawn from the prefetch cache)."""
+        with self.lock:
+            self._cancel_view(view)
+
+    def _cancel_view(self, view):
+        future = self.futures.pop(view, None)
+        request = self.latest.pop(view, None)
+        if future is not None and future.cancel():              #not started yet: never prepared
+            self.in_flight.discard(request)
+            self.counters["cancelled"] += 1
+
+    def _run(self, view, index, params, request):
+        if not self.is_current(view, request):                #a newer request came in while this one waited
+            self._drop(request)
+            return
+        try:
+            image = self.prepare(view, index, params)
+        except Exception as e:
+            print(f"Error preparing {view} slice {index}: {e}")
+            self._drop(request)
+            return
+        if not self.is_current(view, request):
+            self._drop(request)
+            return
+        self.ready.emit(view, index, image, request)          #queued to the GUI thread
+
+    def _drop(self, request):
+        with self.lock:
+            self.in_flight.discard(request)
+            self.counters["stale"] += 1
+
+    def is_current(self, view, request):
+        with self.lock:
+            return self.latest.get(view) is request
+
+    def accept(self, view, request):
+        """Called on the GUI thread with a delivered result; False if it went stale on the way."""
+        with self.lock:
+            self.in_flight.discard(request)
+            current = self.latest.get(view) is request
+            self.counters["delivered" if current else "stale"] += 1
+            return current
+
+    def busy(self):
+        """True while some request is still being prepared or waiting to be delivered."""
+        with self.lock:
+            return bool(self.in_flight)
+
+    def cancel(self):
+        """Make every outstanding request stale (new volume or display mapping)."""
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+            self.latest.clear()
+            self.futures.clear()
+            self.in_flight.clear()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
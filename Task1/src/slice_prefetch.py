@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_DEPTH = 8                          #slices prepared ahead in the scroll direction
+CACHE_CAPACITY = 32                         #display-ready slices kept per orientation
+
+
+class SlicePrefetcher:
+    """Prepares display-ready slices around the current one on a background thread.
+
+    Every orientation has its own bounded cache of ready 8-bit buffers; the oldest
+    entry is dropped when it is full. When a slice is shown, the next PREFETCH_DEPTH
+    slices in the scroll direction (and a couple behind it) are queued. Changing the
+    display mapping (window, brightness/contrast) or the volume calls invalidate(),
+    which empties the caches and makes results still in flight get thrown away.
+    """
+
+    def __init__(self, prepare, depth=PREFETCH_DEPTH, capacity=CACHE_CAPACITY, workers=2):
+        self.prepare = prepare                                #prepare(orientation, index, params) -> 8-bit slice
+        self.depth = depth
+        self.capacity = capacity
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.caches = {}
+        self.pending = set()
+        self.last_index = {}
+        self.generation = 0
+        self.counters = {"hits": 0, "misses": 0, "prefetched": 0}
+
+    def get(self, orientation, index):
+        """The ready buffer of a slice, or None when it has not been prepared."""
+        with self.lock:
+            buffer = self.caches.get(orientation, {}).get(index)
+            self.counters["hits" if buffer is not None else "misses"] += 1
+            return buffer
+
+    def put(self, orientation, index, buffer, generation=None):
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return                                        #prepared with an old window or volume
+            cache = self.caches.setdefault(orientation, OrderedDict())
+            cache[index] = buffer
+            cache.move_to_end(index)
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+
+    def request(self, orientation, index, count, params):
+        """Queue the neighbours of the slice just shown, following the scroll direction."""
+        previous = self.last_index.get(orientation)
+        self.last_index[orientation] = index
+        step = -1 if previous is not None and index < previous else 1
+        wanted = [index + step * i for i in range(1, self.depth + 1)] + [index - step * i for i in (1, 2)]
+        with self.lock:
+            generation = self.generation
+            cache = self.caches.get(orientation, {})
+            todo = [i for i in wanted if 0 <= i < count and i not in cache and (orientation, i) not in self.pending]
+            self.pending.update((orientation, i) for i in todo)
+        for i in todo:
+            self.executor.submit(self._prefetch, orientation, i, params, generation)
+
+    def _prefetch(self, orientation, index, params, generation):
+        try:
+            if generation == self.generation:                 #skip work that was invalidated while queued
+                self.put(orientation, index, self.prepare(orientation, index, params), generation)
+                self.counters["prefetched"] += 1
+        finally:
+            with self.lock:
+                self.pending.discard((orientation, index))
+
+    def invalidate(self):
+        """Forget every prepared slice (new volume, window or brightness/contrast)."""
+        with self.lock:
+            self.generation += 1
+            self.caches.clear()
+            self.pending.clear()
+            self.last_index.clear()
+
+    def shutdown(self):
+        self.invalidate()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,86 @@
+import time
+from timings import timed
+
+
+class SliceView:
+    """Long-lived artists for one 2D view: an AxesImage, a title and two crosshair lines.
+
+    The axes are created once, so the zoom limits survive slice changes. Slice updates
+    only call set_data on the existing artists and blit them over a cached background
+    instead of clearing the figure and drawing everything again.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.ax = canvas.figure.add_subplot(111)
+        self.ax.axis('off')
+        self.image = None
+        self.vline = self.ax.axvline(0, color='red', linestyle='--', visible=False, animated=True)
+        self.hline = self.ax.axhline(0, color='red', linestyle='--', visible=False, animated=True)
+        self.ax.title.set_animated(True)
+        self.background = None
+        self.grid = None                                #(voxel shape, aspect) the axes are fitted to
+        self.last_update_ms = None                      #duration of the latest show() call
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def animated_artists(self):
+        return [artist for artist in (self.image, self.ax.title, self.vline, self.hline) if artist is not None]
+
+    def on_draw(self, event):
+        """After every full draw (first show, resize, zoom) keep the static background for blitting."""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in self.animated_artists():
+            self.ax.draw_artist(artist)
+
+    @timed("slice_view_show")
+    def show(self, image, title, crosshair_position=None, grid_shape=None, aspect=1.0):
+        """Display an 8-bit slice, with an optional (x, y) crosshair.
+
+        Args:
+            grid_shape (optional): (rows, columns) of the slice in voxels when the image was
+                resampled to another size; the axes keep voxel coordinates so the crosshair
+                and mouse positions stay voxel indices.
+            aspect (optional): Physical height/width of one voxel (row spacing / column spacing).
+        """
+        start = time.perf_counter()
+        grid = (tuple(grid_shape or image.shape), aspect)
+        if self.image is None:
+            self.image = self.ax.imshow(image, cmap='gray', vmin=0, vmax=255, interpolation='nearest', animated=True)
+        else:
+            self.image.set_data(image)
+        needs_full_draw = grid != self.grid
+        if needs_full_draw:                             #a new volume or spacing: fit the axes to the new slice
+            self.grid = grid
+            rows, columns = grid[0]
+            self.image.set_extent((-0.5, columns - 0.5, rows - 0.5, -0.5))
+            self.ax.set_xlim(-0.5, columns - 0.5)
+            self.ax.set_ylim(rows - 0.5, -0.5)
+            self.ax.set_aspect(aspect)
+        self.ax.set_title(title)
+
+        if crosshair_position is not None:
+            self.vline.set_xdata([crosshair_position[0], crosshair_position[0]])
+            self.hline.set_ydata([crosshair_position[1], crosshair_position[1]])
+        self.vline.set_visible(crosshair_position is not None)
+        self.hline.set_visible(crosshair_position is not None)
+
+        if needs_full_draw or self.background is None:
+            self.draw()
+        else:
+            self.blit()
+        self.last_update_ms = (time.perf_counter() - start) * 1000
+
+    @timed("canvas_draw")
+    def draw(self):
+        """Full redraw of the figure (the background for blitting is captured in on_draw)."""
+        self.canvas.draw()
+
+    @timed("canvas_blit")
+    def blit(self):
+        """Redraw only the animated artists over the cached background."""
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
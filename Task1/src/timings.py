@@ -0,0 +1,108 @@
+import os, json, time, bisect, threading
+from functools import wraps
+
+TIMINGS_ENV = "TASK1_TIMINGS"                   #set to 1 to record timings from the start
+TIMINGS_FILE_ENV = "TASK1_TIMINGS_FILE"         #where the JSON dump goes on exit
+DEFAULT_TIMINGS_FILE = "task1_timings.json"
+BIN_EDGES_MS = [10 ** (exponent / 20) for exponent in range(-60, 81)]    #1 us .. 10 s, 20 bins per decade
+
+
+class Histogram:
+    """Durations of one hot path in logarithmic bins, so millions of calls cost a fixed amount of memory."""
+
+    def __init__(self):
+        self.bins = [0] * (len(BIN_EDGES_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+
+    def add(self, ms):
+        self.bins[bisect.bisect_left(BIN_EDGES_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def percentile(self, q):
+        """Upper edge of the bin holding the q-th percentile (within 12% of the true value)."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.bins):
+            seen += count
+            if seen >= rank and count:
+                return min(BIN_EDGES_MS[i] if i < len(BIN_EDGES_MS) else self.max_ms, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {"count": self.count, "mean_ms": self.total_ms / self.count if self.count else None,
+                "p50_ms": self.percentile(50), "p95_ms": self.percentile(95), "p99_ms": self.percentile(99),
+                "max_ms": self.max_ms, "last_ms": self.last_ms}
+
+
+class TimingRecorder:
+    """Per-call timings of the viewer's hot paths, off unless asked for.
+
+    Turned on with TASK1_TIMINGS=1 or the "Timings" toolbar button. When it is off a
+    timed call only checks one attribute.
+    """
+
+    def __init__(self, enabled=False, path=DEFAULT_TIMINGS_FILE):
+        self.enabled = enabled
+        self.path = path
+        self.lock = threading.Lock()                #the loader and the prefetcher record from their threads
+        self.histograms = {}
+
+    @classmethod
+    def from_environment(cls):
+        return cls(os.environ.get(TIMINGS_ENV, "0") not in ("", "0"),
+                   os.environ.get(TIMINGS_FILE_ENV, DEFAULT_TIMINGS_FILE))
+
+    def record(self, name, ms):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def get(self, name):
+        return self.histograms.get(name)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def dump(self, path=None):
+        """Write the summary of every hot path as JSON; returns the path, or None when nothing was recorded."""
+        summary = self.summary()
+        if not summary:
+            return None
+        path = path or self.path
+        with open(path, "w") as f:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "timings": summary}, f, indent=2)
+        return path
+
+
+recorder = TimingRecorder.from_environment()
+
+
+def timed(name):
+    """Decorator recording the duration of every call under name while the recorder is enabled."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+import time
+from PyQt5.QtCore import QTimer
+
+FRAME_INTERVAL_MS = 16                      #one render per display frame at 60 Hz
+
+
+class UpdateScheduler:
+    """Collects view update requests and renders each dirty view at most once per frame.
+
+    Slider and crosshair events only mark views as dirty; a single-shot timer then
+    renders the dirty set in one go, so a burst of events (one mouse move moving two
+    sliders, a fast slider drag) costs one render per view per frame.
+    """
+
+    def __init__(self, render, frame_interval_ms=FRAME_INTERVAL_MS):
+        self.render = render                                  #called with the set of dirty view names
+        self.frame_interval_ms = frame_interval_ms
+        self.dirty = set()
+        self.requested_at = {}                                #view -> time of its oldest request not yet on screen
+        self.last_flush = 0.0
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+        self.counters = {"requests": 0, "frames": 0, "renders": 0}
+
+    def mark_dirty(self, *views):
+        """Ask for views to be redrawn on the next frame."""
+        self.counters["requests"] += len(views)
+        self.dirty.update(views)
+        now = time.perf_counter()
+        for view in views:
+            self.requested_at.setdefault(view, now)
+        if not self.timer.isActive():
+            elapsed_ms = (time.perf_counter() - self.last_flush) * 1000
+            self.timer.start(int(max(0, self.frame_interval_ms - elapsed_ms)))
+
+    def flush(self):
+        """Render every dirty view now."""
+        self.timer.stop()
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        self.last_flush = time.perf_counter()
+        self.counters["frames"] += 1
+        self.counters["renders"] += len(dirty)
+        self.render(dirty)
+
+    def shown(self, view):
+        """The view's slice is on screen: milliseconds since it was first marked dirty, or None."""
+        requested = self.requested_at.pop(view, None)
+        return None if requested is None else (time.perf_counter() - requested) * 1000
+
+    def coalesced(self):
+        """Number of view requests that did not cost a render."""
+        return self.counters["requests"] - self.counters["renders"]
+
+    def reset_counters(self):
+        for key in self.counters:
+            self.counters[key] = 0
@@ -0,0 +1,61 @@
+import sys
+from dicom_loader import allocate_volume, MEMMAP_THRESHOLD
+
+LAYOUT_CHUNK = 16                           #output slices copied per step, keeps the temporary reads small
+
+
+def oriented_view(volume, key):
+    """A strided view of the volume whose [i] is slice i of a view, already turned for display.
+
+    Sagittal slices are rotated by 180 degrees and coronal slices flipped upside down,
+    like the viewer displays them. No data is copied.
+    """
+    if key == "Axial":
+        return volume
+    if key == "Sagittal":
+        return volume.transpose(1, 0, 2)[:, ::-1, ::-1]
+    return volume.transpose(2, 0, 1)[:, ::-1, :]
+
+
+def build_layout(volume, key, cancel=None, memmap_threshold=MEMMAP_THRESHOLD):
+    """Contiguous copy of oriented_view(volume, key), so each of its slices is one sequential read.
+
+    The copy is made LAYOUT_CHUNK slices at a time; returns None if cancel() becomes True.
+    """
+    view = oriented_view(volume, key)
+    layout = allocate_volume(view.shape, view.dtype, memmap_threshold)
+    for start in range(0, view.shape[0], LAYOUT_CHUNK):
+        if cancel is not None and cancel():
+            return None
+        layout[start:start + LAYOUT_CHUNK] = view[start:start + LAYOUT_CHUNK]
+    return layout
+
+
+def build_layouts(volume, keys=("Sagittal", "Coronal"), cancel=None, memmap_threshold=MEMMAP_THRESHOLD):
+    """Build the contiguous layouts of several orientations; None if cancelled."""
+    layouts = {}
+    for key in keys:
+        layout = build_layout(volume, key, cancel, memmap_threshold)
+        if layout is None:
+            return None
+        layouts[key] = layout
+    return layouts
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def memory_report(volume, layouts):
+    """Sizes in MB of the volume, its extra layouts and the peak memory of the process."""
+    return {
+        "volume_mb": volume.nbytes / 2**20,
+        "layouts_mb": sum(layout.nbytes for layout in layouts.values()) / 2**20,
+        "peak_rss_mb": peak_rss_mb(),
+    }
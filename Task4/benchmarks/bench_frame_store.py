@@ -0,0 +1,141 @@
+"""Frames/second of the clip preprocessing: per-frame normalisation versus the batched FrameStore.
+
+Usage:
+    python bench_frame_store.py [--frames 300] [--rows 768] [--columns 1024] [--bits 8] [--color] [--rle]
+                                [--workers 1 2 4] [--repeat 3] [--file clip.dcm]
+
+Every timing is the best of --repeat runs, each on a freshly opened file.
+"""
+import argparse, os, sys, tempfile, time
+import numpy as np
+import pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, RLELossless, generate_uid
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:                                   #let the benchmark import the viewer modules
+    sys.path.insert(0, SRC_DIR)
+
+from frame_source import FrameSource, DEFER_SIZE
+from frame_store import FrameStore
+
+ULTRASOUND_MULTIFRAME = "1.2.840.10008.5.1.4.1.1.3.1"
+
+
+def write_clip(path, frames, rows, columns, bits=8, color=False, rle=False, frame_time=33.333,
+               bits_stored=None, signed=False):
+    """Write a synthetic multi-frame clip (a moving gradient with noise) and return its path.
+
+    With bits_stored < bits the unused high bits of every uncompressed word are filled with
+    noise, as some modalities leave them; readers must mask them (or sign-extend signed values).
+    """
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = ULTRASOUND_MULTIFRAME
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds = Dataset()
+    ds.file_meta = meta
+    ds.SOPClassUID, ds.SOPInstanceUID = meta.MediaStorageSOPClassUID, meta.MediaStorageSOPInstanceUID
+    ds.Rows, ds.Columns, ds.NumberOfFrames, ds.FrameTime = rows, columns, frames, frame_time
+    ds.SamplesPerPixel = 3 if color else 1
+    ds.PhotometricInterpretation = "RGB" if color else "MONOCHROME2"
+    if color:
+        ds.PlanarConfiguration = 0
+    bits_stored = bits_stored or bits
+    ds.BitsAllocated, ds.BitsStored = bits, bits_stored
+    ds.HighBit, ds.PixelRepresentation = bits_stored - 1, int(signed)
+    dtype = np.uint8 if bits == 8 else np.uint16
+    y, x = np.mgrid[:rows, :columns]
+    rng = np.random.default_rng(0)
+    pixels = np.empty((frames, rows, columns) + ((3,) if color else ()), dtype=dtype)
+    for i in range(frames):
+        frame = ((x + y + 8 * i) % 256 + rng.integers(0, 16, size=(rows, columns))) * (1 if bits == 8 else 16)
+        if bits_stored < bits:
+            frame = frame % 2 ** bits_stored
+            if not rle:                                 #the RLE encoder checks values fit in bits_stored
+                frame += rng.integers(0, 2 ** (bits - bits_stored), size=(rows, columns)) << bits_stored
+        pixels[i] = frame[..., np.newaxis] if color else frame
+    if rle:
+        ds.compress(RLELossless, pixels)
+    else:
+        ds.PixelData = pixels.tobytes()
+    ds.save_as(path, enforce_file_format=True)
+    return path
+
+
+def normalize_per_frame(frame):
+    """What playback did before: grayscale and min/max of every frame on its own."""
+    if frame.ndim == 3:
+        frame = 0.2989 * frame[:, :, 0] + 0.5870 * frame[:, :, 1] + 0.1140 * frame[:, :, 2]
+    spread = np.ptp(frame)
+    if spread == 0:
+        return np.zeros(frame.shape, dtype=np.uint8)
+    return (255.0 * (frame - np.min(frame)) / spread).astype(np.uint8)
+
+
+def open_clip(path):
+    dataset = pydicom.dcmread(path, defer_size=DEFER_SIZE)
+    return FrameSource(path, dataset), dataset
+
+
+def best_time(run, repeat):
+    """Shortest of repeat runs of run() and the result of the last one."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def per_frame(path):
+    """The baseline: every frame of a freshly opened file normalised on its own."""
+    source, dataset = open_clip(path)
+    for frame in source.frames():
+        normalize_per_frame(frame)
+
+
+def build_store(path, workers):
+    source, dataset = open_clip(path)
+    store = FrameStore(source, dataset, workers=workers)
+    store.build()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=768)
+    parser.add_argument("--columns", type=int, default=1024)
+    parser.add_argument("--bits", type=int, choices=(8, 16), default=8)
+    parser.add_argument("--color", action="store_true", help="RGB frames")
+    parser.add_argument("--rle", action="store_true", help="RLE Lossless pixel data (slow to write)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the best one is reported")
+    parser.add_argument("--file", help="benchmark an existing multi-frame DICOM file instead of a synthetic clip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file or write_clip(os.path.join(tmp, "clip.dcm"), args.frames, args.rows, args.columns,
+                                       args.bits, args.color, args.rle)
+        source, dataset = open_clip(path)
+        shape = "x".join(str(size) for size in source.shape)
+        print(f"{len(source)} frames of {shape}, {dataset.file_meta.TransferSyntaxUID.name}")
+        print(f"{'method':>16} {'seconds':>9} {'frames/s':>9} {'speedup':>8}")
+
+        baseline, _ = best_time(lambda: per_frame(path), args.repeat)
+        print(f"{'per frame':>16} {baseline:>9.3f} {len(source) / baseline:>9.1f} {1:>7.2f}x")
+
+        for workers in args.workers:
+            elapsed, store = best_time(lambda: build_store(path, workers), args.repeat)
+            label = f"store {workers} worker{'s' if workers > 1 else ''}"
+            print(f"{label:>16} {elapsed:>9.3f} {len(store) / elapsed:>9.1f} {baseline / elapsed:>7.2f}x")
+        if store.pixels is not None:
+            print(f"frame store {store.pixels.nbytes / 2**20:.1f} MB, contiguous: {store.pixels.flags['C_CONTIGUOUS']}")
+        else:
+            print("clip larger than the frame store limit: frames are converted one at a time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Check that FrameSource returns the same frames as pydicom's pixel_array.
+
+Covers the memory-mapped path (8 and 16 bits, RGB, 12 bits stored in 16 with noise in
+the unused high bits, signed and unsigned) and the decoded path (RLE Lossless).
+
+Usage:
+    python check_frame_source.py [--frames 8] [--rows 64] [--columns 80]
+"""
+import argparse, os, sys, tempfile
+import numpy as np
+import pydicom
+
+from bench_frame_store import write_clip, open_clip
+
+CASES = (
+    ("8 bit", dict(bits=8)),
+    ("16 bit", dict(bits=16)),
+    ("8 bit RGB", dict(bits=8, color=True)),
+    ("12 in 16 bit", dict(bits=16, bits_stored=12)),
+    ("12 in 16 bit signed", dict(bits=16, bits_stored=12, signed=True)),
+    ("12 in 16 bit RLE", dict(bits=16, bits_stored=12, rle=True)),
+)
+
+
+def check(path):
+    """Names of the FrameSource accessors whose frames differ from pixel_array (empty when all match)."""
+    expected = pydicom.dcmread(path).pixel_array
+    source, dataset = open_clip(path)
+    failed = []
+    if not all(np.array_equal(source[i], expected[i]) for i in range(len(source))):
+        failed.append("[i]")
+    if not np.array_equal(source.batch(0, len(source)), expected):
+        failed.append("batch()")
+    return failed, source.mapped is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=64)
+    parser.add_argument("--columns", type=int, default=80)
+    args = parser.parse_args()
+
+    errors = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in CASES:
+            path = write_clip(os.path.join(tmp, "clip.dcm"), args.frames, args.rows, args.columns, **options)
+            failed, mapped = check(path)
+            errors += bool(failed)
+            result = "differs: " + ", ".join(failed) if failed else "ok"
+            print(f"{name:>24} {'mapped' if mapped else 'decoded':>8}  {result}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
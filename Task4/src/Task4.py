@@ -3,14 +3,33 @@ import random
 import pydicom
 import numpy as np
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QGraphicsPixmapItem, 
-    QTextEdit, QLineEdit, QWidget, QTabWidget, QSplitter, QInputDialog , QTableWidget , QTableWidgetItem , QHeaderView , QScrollArea , QSizePolicy ,QGridLayout  , QGraphicsView , QGraphicsScene
+    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, 
+    QTextEdit, QLineEdit, QWidget, QTabWidget, QSplitter, QInputDialog , QHeaderView , QScrollArea , QSizePolicy ,QGridLayout  , QGraphicsView , QGraphicsScene ,
+    QSlider , QCheckBox , QTableView
 )
-from PyQt5.QtCore import Qt, QTimer , QEvent 
+from PyQt5.QtCore import Qt, QEvent , QThread , pyqtSignal , QRectF
 from PyQt5.QtGui import QPixmap, QImage , QPainter
 import vtk
 from vtk.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from pydicom.multival import MultiValue
+from frame_source import FrameSource, DEFER_SIZE
+from cine_player import CinePlayer, frame_interval_ms
+from frame_store import FrameStore
+from tile_grid import TileGrid, TILE_COLUMNS, TILE_SIZE, TILE_PADDING
+from tag_model import MetadataTableModel, value_text
+
+
+class FrameStoreBuilder(QThread):
+    # Converts a whole clip into its 8-bit frame store in the background
+    built = pyqtSignal(float)  # seconds it took
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def run(self):
+        self.built.emit(self.store.build())
+
 
 class DicomViewer(QMainWindow):
     def __init__(self):
@@ -19,11 +38,16 @@ class DicomViewer(QMainWindow):
         self.setGeometry(100, 100, 1200, 800)
         
         self.dicom_file = None
+        self.frame_source = None                                                    # frames decoded on demand
         self.m2d_frames = []                                                        
-        self.m2d_timer = QTimer()
+        self.frame_store = None                                                     # display-ready 8-bit frames of the clip
+        self.store_builder = None
+        self.cine_player = CinePlayer()                                             # renders frames ahead on a worker thread
         self.m2d_index = 0
 
         self.init_ui()
+        self.cine_player.frame_ready.connect(self.play_m2d_video)
+        self.cine_player.finished.connect(self.on_video_finished)
 
     def init_ui(self):
         self.tabs = QTabWidget()
@@ -74,8 +98,30 @@ class DicomViewer(QMainWindow):
         self.image_label.setFixedSize(500, 500)  # Set a fixed size for the video area
         self.image_label.setScaledContents(False)  # Prevent the video from scaling to fit the label
 
+        # Cine controls: pause/play, scrub and loop
+        cine_layout = QHBoxLayout()
+        self.play_pause_button = QPushButton("Pause")
+        self.play_pause_button.clicked.connect(self.toggle_pause)
+        self.play_pause_button.setEnabled(False)
+
+        self.frame_slider = QSlider(Qt.Horizontal)
+        self.frame_slider.setEnabled(False)
+        self.frame_slider.valueChanged.connect(self.scrub_video)
+
+        self.loop_checkbox = QCheckBox("Loop")
+        self.loop_checkbox.toggled.connect(self.cine_player.set_loop)
+
+        self.cine_status = QLabel("")
+        self.cine_status.setMinimumWidth(260)
+
+        cine_layout.addWidget(self.play_pause_button)
+        cine_layout.addWidget(self.frame_slider)
+        cine_layout.addWidget(self.loop_checkbox)
+        cine_layout.addWidget(self.cine_status)
+
         layout.addLayout(button_layout)
         layout.addWidget(self.image_label, alignment=Qt.AlignCenter)  # Center the label in the layout
+        layout.addLayout(cine_layout)
 
         self.image_tab.setLayout(layout)
 
@@ -141,10 +187,11 @@ class DicomViewer(QMainWindow):
         
 
         self.metadata_tab.setLayout(layout)
-            # Table for metadata display
-        self.metadata_table = QTableWidget()
-        self.metadata_table.setColumnCount(3)
-        self.metadata_table.setHorizontalHeaderLabels(["Tag", "Name", "Value"])
+            # Table for metadata display, rows are only rendered when they are visible
+        self.metadata_model = MetadataTableModel()
+        self.metadata_table = QTableView()
+        self.metadata_table.setModel(self.metadata_model)
+        self.metadata_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # No per-row size computation
         self.metadata_table.horizontalHeader().setStretchLastSection(True)
         self.metadata_table.horizontalHeader().setSectionResizeMode(0, 1)  # Adjust column sizes
         self.metadata_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Interactive)  # Adjust "Tag" column
@@ -174,14 +221,16 @@ class DicomViewer(QMainWindow):
         self.graphics_scene = QGraphicsScene(self)
         self.graphics_view.setScene(self.graphics_scene)
         self.graphics_view.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
+        self.graphics_view.viewport().installEventFilter(self)  # Ctrl+wheel zoom and resizes
+        self.tile_grid = TileGrid(self.graphics_view)  # Only builds the tiles in view
         
         # Buttons for zoom controls
         zoom_layout = QHBoxLayout()
         self.zoom_in_button = QPushButton("Zoom In")
-        self.zoom_in_button.clicked.connect(lambda: self.graphics_view.scale(1.2, 1.2))  # Zoom in by 20%
+        self.zoom_in_button.clicked.connect(lambda: self.zoom_tiles(1.2))  # Zoom in by 20%
 
         self.zoom_out_button = QPushButton("Zoom Out")
-        self.zoom_out_button.clicked.connect(lambda: self.graphics_view.scale(0.8, 0.8))  # Zoom out by 20%
+        self.zoom_out_button.clicked.connect(lambda: self.zoom_tiles(0.8))  # Zoom out by 20%
 
         zoom_layout.addWidget(self.zoom_in_button)
         zoom_layout.addWidget(self.zoom_out_button)
@@ -201,7 +250,12 @@ class DicomViewer(QMainWindow):
     def load_dicom_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select DICOM File", "", "DICOM Files (*.dcm)")
         if file_path:
-            self.dicom_file = pydicom.dcmread(file_path)
+            self.stop_video()
+            self.stop_frame_store()
+            self.tile_grid.clear()
+            # Large values (the pixel data) stay on disk until a frame is asked for
+            self.dicom_file = pydicom.dcmread(file_path, defer_size=DEFER_SIZE)
+            self.frame_source = FrameSource(file_path, self.dicom_file) if "PixelData" in self.dicom_file else None
             self.show_image_button.setEnabled(True)
             self.show_tags_button.setEnabled(True)
             self.patient_button.setEnabled(True)
@@ -213,8 +267,13 @@ class DicomViewer(QMainWindow):
             self.anonymize_button.setEnabled(True)
     
             # Check for M2D and prepare frames
-            if hasattr(self.dicom_file, "NumberOfFrames"):
-                self.m2d_frames = [self.dicom_file.pixel_array[i] for i in range(self.dicom_file.NumberOfFrames)]
+            if hasattr(self.dicom_file, "NumberOfFrames") and self.frame_source is not None:
+                # One window for the whole clip; frames are converted in batches in the background
+                self.frame_store = FrameStore(self.frame_source, self.dicom_file)
+                self.m2d_frames = self.frame_store                                  # list-like, converts a frame if asked before its batch
+                self.store_builder = FrameStoreBuilder(self.frame_store)
+                self.store_builder.built.connect(self.on_frame_store_built)
+                self.store_builder.start()
                 self.metadata_display.append(f"Loaded an M2D file with {len(self.m2d_frames)} frames.")
             else:
                 self.metadata_display.append("DICOM file loaded successfully.")
@@ -222,27 +281,48 @@ class DicomViewer(QMainWindow):
             self.metadata_display.append("No file selected.")
 
 
+    def on_frame_store_built(self, seconds):
+        store = self.frame_store
+        if store is None or store.cancelled.is_set() or not store.complete():
+            return
+        self.metadata_display.append(f"Converted {len(store)} frames in {seconds:.2f} s "
+                                     f"({len(store) / max(seconds, 1e-9):.0f} frames/s).")
+
+
+    def stop_frame_store(self):
+        if self.store_builder is not None:
+            self.store_builder.store.cancel()
+            self.store_builder.wait()
+            self.store_builder = None
+        self.frame_store = None
+        self.m2d_frames = []
+
+
     def display_image(self):
-        if not hasattr(self.dicom_file, "pixel_array"):
+        if self.frame_source is None:
             self.metadata_display.append("No image data found in the DICOM file.")
             return
 
         if hasattr(self.dicom_file, "NumberOfFrames"):  # M2D - play video
             self.m2d_index = 0
             self.stop_video_button.setEnabled(True)
-
-            # Safely disconnect any existing connections
-            try:
-                self.m2d_timer.timeout.disconnect(self.play_m2d_video)
-            except TypeError:
-                pass  # No connection exists, so nothing to disconnect
-
-            # Reconnect and start the timer
-            self.m2d_timer.timeout.connect(self.play_m2d_video)
-            self.m2d_timer.start(100)  # Set the frame interval in milliseconds
-            self.metadata_display.append(f"Playing M2D video with {len(self.m2d_frames)} frames.")
+            self.play_pause_button.setEnabled(True)
+            self.play_pause_button.setText("Pause")
+            self.frame_slider.setEnabled(True)
+            self.frame_slider.blockSignals(True)  # Setting the range is not a scrub
+            self.frame_slider.setRange(0, len(self.m2d_frames) - 1)
+            self.frame_slider.setValue(0)
+            self.frame_slider.blockSignals(False)
+
+            # Play at the acquisition rate of the file (FrameTime / CineRate, else 100 ms)
+            interval = frame_interval_ms(self.dicom_file)
+            self.cine_player.set_loop(self.loop_checkbox.isChecked())
+            self.cine_player.start(self.m2d_frames, interval)
+            self.metadata_display.append(f"Playing M2D video with {len(self.m2d_frames)} frames "
+                                         f"at {1000 / interval:.1f} frames/s.")
         else:  # 2D - show single image
-            self.display_2d_image(self.dicom_file.pixel_array)
+            self.stop_video()
+            self.display_2d_image(self.frame_source[0])
 
 
 
@@ -282,202 +362,111 @@ class DicomViewer(QMainWindow):
 
 
 
-    def play_m2d_video(self):
-        if not self.m2d_frames or self.m2d_index >= len(self.m2d_frames):
-            self.m2d_timer.stop()
-            self.stop_video_button.setEnabled(False)
-            return
+    def play_m2d_video(self, index, image):
+        # Called by the cine player with the frame that is due; the image is already display-ready
+        self.m2d_index = index
+        self.image_label.setPixmap(QPixmap.fromImage(image))
+        self.image_label.setScaledContents(True)
 
-        frame = self.m2d_frames[self.m2d_index]
+        # Follow playback with the scrub slider without seeking
+        self.frame_slider.blockSignals(True)
+        self.frame_slider.setValue(index)
+        self.frame_slider.blockSignals(False)
+        self.update_cine_status()
 
-        # Validate the frame
-        if not isinstance(frame, np.ndarray):
-            self.metadata_display.append(f"Frame at index {self.m2d_index} is not a valid NumPy array.")
-            self.m2d_index += 1
-            return
 
-        try:
-            # Convert color image to grayscale manually if needed
-            if frame.ndim == 3 and frame.shape[2] == 3:
-                # Using the standard grayscale formula: 0.2989 * R + 0.5870 * G + 0.1140 * B
-                frame = (0.2989 * frame[:, :, 0] + 
-                        0.5870 * frame[:, :, 1] + 
-                        0.1140 * frame[:, :, 2]).astype(np.uint8)
-            elif frame.ndim != 2:
-                self.metadata_display.append(f"Frame at index {self.m2d_index} has unsupported shape: {frame.shape}")
-                self.m2d_index += 1
-                return
-
-            # Normalize the frame for display
-            if np.ptp(frame) == 0:
-                normalized = (frame - np.min(frame)).astype(np.uint8)
-            else:
-                normalized = (255.0 * (frame - np.min(frame)) / np.ptp(frame)).astype(np.uint8)
+    def update_cine_status(self):
+        fps = self.cine_player.fps()
+        rate = f"{fps:.1f}" if fps else "-"
+        self.cine_status.setText(f"Frame {self.m2d_index + 1}/{len(self.m2d_frames)}  {rate} / "
+                                 f"{1000 / self.cine_player.interval_ms:.1f} fps  "
+                                 f"dropped {self.cine_player.counters['dropped']}")
 
-            # Create QImage
-            height, width = normalized.shape
-            image = QImage(normalized.data, width, height, width, QImage.Format_Grayscale8)
-            if image.isNull():
-                self.metadata_display.append(f"Failed to create QImage for frame at index {self.m2d_index}.")
-                self.m2d_index += 1
-                return
 
-            # Update QLabel
-            pixmap = QPixmap.fromImage(image)
-            self.image_label.setPixmap(pixmap)
-            self.image_label.setScaledContents(True)
-
-        except Exception as e:
-            self.metadata_display.append(f"Error processing frame at index {self.m2d_index}: {e}")
+    def toggle_pause(self):
+        if self.cine_player.playing:
+            self.cine_player.pause()
+            self.play_pause_button.setText("Play")
+        else:
+            self.cine_player.resume()
+            self.play_pause_button.setText("Pause")
 
-        # Increment the frame index
-        self.m2d_index += 1
 
+    def scrub_video(self, index):
+        # Show the frame under the slider at once, playback (if running) goes on from there
+        self.cine_player.seek(index)
 
 
+    def on_video_finished(self):
+        self.play_pause_button.setText("Play")
+        self.metadata_display.append(f"M2D video finished: {self.cine_player.counters['shown']} frames shown, "
+                                     f"{self.cine_player.counters['dropped']} dropped.")
 
 
     def stop_video(self):
-        self.m2d_timer.stop()
-        try:
-            self.m2d_timer.timeout.disconnect(self.play_m2d_video)  # Safely disconnect
-        except TypeError:
-            pass
+        self.cine_player.stop()
         self.stop_video_button.setEnabled(False)
+        self.play_pause_button.setEnabled(False)
+        self.play_pause_button.setText("Pause")
+        self.frame_slider.setEnabled(False)
 
     def display_3d_tiles(self):
-        if not self.dicom_file:
+        if not self.dicom_file or self.frame_source is None:
             self.metadata_display.append("No DICOM file loaded for tiles.")
             return
 
         try:
-            if hasattr(self.dicom_file, "NumberOfFrames") and self.dicom_file.NumberOfFrames > 1:
-                slices = [self.dicom_file.pixel_array[i] for i in range(self.dicom_file.NumberOfFrames)]
-                data_type = "2D multi-frame"
-            elif self.dicom_file.pixel_array.ndim == 3:
-                slices = [self.dicom_file.pixel_array[i] for i in range(self.dicom_file.pixel_array.shape[0])]
-                data_type = "3D"
-            elif self.dicom_file.pixel_array.ndim == 2:
-                slices = [self.dicom_file.pixel_array]
-                data_type = "Single 2D image"
-            else:
-                self.metadata_display.append("Unsupported DICOM format. Could not determine data type.")
-                return
-        except AttributeError as e:
+            # Same 8-bit frames as playback; single-frame files get a store of their own
+            store = self.frame_store or FrameStore(self.frame_source, self.dicom_file)
+        except Exception as e:
             self.metadata_display.append(f"Error reading pixel data: {str(e)}")
             return
+        data_type = "2D multi-frame" if len(store) > 1 else "Single 2D image"
 
-        self.graphics_scene.clear()
-
-        # Tile dimensions
-        thumbnail_width = 100  # Width of each tile
-        thumbnail_height = 100  # Height of each tile
-        columns = 5
-        padding = 20
-
-        total_tiles = len(slices)
-        rows = (total_tiles + columns - 1) // columns
-
-        for i, slice_image in enumerate(slices):
-            if slice_image.ndim > 2:
-                slice_image = slice_image.squeeze()
-            if slice_image.ndim != 2:
-                self.metadata_display.append(f"Slice {i} has an unsupported shape: {slice_image.shape}. Skipping.")
-                continue
-
-            normalized = (255.0 * (slice_image - np.min(slice_image)) / np.ptp(slice_image)).astype(np.uint8)
-
-            # Resize ignoring aspect ratio
-            thumbnail = QImage(normalized.data, normalized.shape[1], normalized.shape[0],
-                            normalized.shape[1], QImage.Format_Grayscale8).scaled(
-                thumbnail_width, thumbnail_height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
-            )
-
-            pixmap = QPixmap.fromImage(thumbnail)
-
-            row, col = divmod(i, columns)
-            x_pos = col * (thumbnail_width + padding)
-            y_pos = row * (thumbnail_height + padding)
-
-            item = QGraphicsPixmapItem(pixmap)
-            item.setPos(x_pos, y_pos)
-            item.setData(0, normalized)
-            self.graphics_scene.addItem(item)
-
-        # Update scene dimensions
-        self.graphics_scene.setSceneRect(0, 0, columns * (thumbnail_width + padding), rows * (thumbnail_height + padding))
+        self.tile_grid.set_store(store)
 
+        # Fit the width of the grid (a few rows), not the whole grid: thousands of tiles would be specks
+        pitch = TILE_SIZE + TILE_PADDING
+        width = TILE_COLUMNS * pitch
         self.graphics_view.resetTransform()
-        self.graphics_view.fitInView(self.graphics_scene.sceneRect(), Qt.KeepAspectRatio)
-        self.graphics_view.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
-
-        self.metadata_display.append(f"Displayed {data_type} data with {len(slices)} tiles.")
-
-
-
+        self.graphics_view.fitInView(QRectF(0, 0, width, min(width, self.graphics_scene.sceneRect().height())),
+                                     Qt.KeepAspectRatio)
+        self.graphics_view.verticalScrollBar().setValue(self.graphics_view.verticalScrollBar().minimum())
+        self.tile_grid.schedule_update()
 
+        self.metadata_display.append(f"Displayed {data_type} data with {len(store)} tiles.")
 
 
+    def zoom_tiles(self, factor):
+        self.graphics_view.scale(factor, factor)
+        self.tile_grid.schedule_update()  # Level of detail follows the zoom
 
 
     def eventFilter(self, source, event):
-        if event.type() == QEvent.Wheel and source == self.graphics_view.viewport():
-            # Adjust quality when zooming
-            scale_factor = self.graphics_view.transform().m11()  # Get current scale
-            for item, pixmap_high_res in self.slice_items:
-                if scale_factor > 1.5:  # Threshold for replacing with high-res
-                    item.setPixmap(pixmap_high_res)
-                else:  # Use thumbnail for normal display
-                    item.setPixmap(pixmap_high_res.scaled(120, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        if source == self.graphics_view.viewport():
+            if event.type() == QEvent.Wheel and event.modifiers() & Qt.ControlModifier:
+                # Ctrl+wheel zooms the tiles, quality is adjusted by the tile grid
+                self.zoom_tiles(1.2 if event.angleDelta().y() > 0 else 0.8)
+                return True
+            if event.type() == QEvent.Resize:
+                self.tile_grid.schedule_update()
         return super().eventFilter(source, event)
 
 
-
-
-
-
     def display_dicom_tags(self):
-        not_rendered = "Pixel Data"
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
-        for elem in self.dicom_file.iterall():
-            if elem.name != not_rendered:
-                # Add a new row to the table
-                row_position = self.metadata_table.rowCount()
-                self.metadata_table.insertRow(row_position)
-
-                # Populate the row with tag, name, and value
-                self.metadata_table.setItem(row_position, 0, QTableWidgetItem(str(elem.tag)))
-                self.metadata_table.setItem(row_position, 1, QTableWidgetItem(elem.name))
-                self.metadata_table.setItem(row_position, 2, QTableWidgetItem(str(elem.value)))
+        # Elements are listed as the table scrolls, values are rendered (and cut) only for visible rows
+        self.metadata_model.show_dataset(self.dicom_file)
 
     def search_dicom_tag(self):
         search_term = self.search_box.text().strip().lower()
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
-        found = False
-        for elem in self.dicom_file.iterall():
-            if search_term in elem.name.lower():  # Search in the name of the tag
-                row_position = self.metadata_table.rowCount()
-                self.metadata_table.insertRow(row_position)  # Add a new row
-
-                # Insert Tag, Name, and Value into respective columns
-                self.metadata_table.setItem(row_position, 0, QTableWidgetItem(str(elem.tag)))
-                self.metadata_table.setItem(row_position, 1, QTableWidgetItem(elem.name))
-                self.metadata_table.setItem(row_position, 2, QTableWidgetItem(str(elem.value)))
-
-                found = True
+        # Search in the name of the tag
+        self.metadata_model.show_dataset(self.dicom_file, match=lambda name: search_term in name.lower())
 
-        if not found:
-            self.metadata_table.setRowCount(1)  # Add a single row to display "not found" message
-            self.metadata_table.setItem(0, 0, QTableWidgetItem("N/A"))
-            self.metadata_table.setItem(0, 1, QTableWidgetItem("No matching tag found"))
-            self.metadata_table.setItem(0, 2, QTableWidgetItem("N/A"))
+        if self.metadata_model.rowCount() == 0:  # Display a "not found" message
+            self.metadata_model.show_rows([("N/A", "No matching tag found", "N/A")])
 
 
     def display_patient_info(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
         # Patient information fields
         patient_info = [
             ("(0010,0010)", "Patient's Name", self.dicom_file.get('PatientName', 'N/A')),
@@ -485,95 +474,44 @@ class DicomViewer(QMainWindow):
             ("(0010,0030)", "Patient's Birth Date", self.dicom_file.get('PatientBirthDate', 'N/A')),
             ("(0010,0040)", "Patient's Sex", self.dicom_file.get('PatientSex', 'N/A')),
         ]
-
-        for tag, name, value in patient_info:
-            row_position = self.metadata_table.rowCount()
-            self.metadata_table.insertRow(row_position)
-
-            # Convert non-string values to strings
-            if not isinstance(value, str):
-                value = str(value)
-
-            self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-            self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-            self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+        self.metadata_model.show_rows(patient_info)
 
 
     def display_pixel_data(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
-        # Display pixel data
+        # Display pixel data, summarised without reading it (it may still be on disk)
         tag = "(7FE0,0010)"
         name = "Pixel Data"
-        value = self.dicom_file.get('PixelData', 'N/A')
-
-        # Handle 'bytes' or other non-string data types
-        if isinstance(value, bytes):
-            # Display a string indicating the size of the data (e.g., "Binary data: 1024 bytes")
-            value = f"Binary data: {len(value)} bytes"
-        elif not isinstance(value, str):
-            # Convert any other type to string
-            value = str(value)
-
-        row_position = self.metadata_table.rowCount()
-        self.metadata_table.insertRow(row_position)
-        self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-        self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-        self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+        value = value_text(self.dicom_file, 0x7FE00010) if "PixelData" in self.dicom_file else "N/A"
+        self.metadata_model.show_rows([(tag, name, value)])
 
 
     def display_study_info(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
         # Populate table with study info
         study_data = [
             ("(0020,0010)", "Study ID", self.dicom_file.get('StudyID', 'N/A')),
             ("(0008,0020)", "Study Date", self.dicom_file.get('StudyDate', 'N/A')),
         ]
-
-        for tag, name, value in study_data:
-            row_position = self.metadata_table.rowCount()
-            self.metadata_table.insertRow(row_position)
-            self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-            self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-            self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+        self.metadata_model.show_rows(study_data)
 
 
     def display_modality_info(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
         # Display modality info
         tag = "(0008,0060)"
         name = "Modality"
         value = self.dicom_file.get('Modality', 'N/A')
-
-        row_position = self.metadata_table.rowCount()
-        self.metadata_table.insertRow(row_position)
-        self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-        self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-        self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+        self.metadata_model.show_rows([(tag, name, value)])
 
 
     def display_physician_info(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
         # Populate table with physician info
         physician_data = [
             ("(0008,0090)", "Physician Name", self.dicom_file.get('PhysicianName', 'N/A')),
             ("(0008,1048)", "Physician ID", self.dicom_file.get('PhysicianID', 'N/A')),
         ]
-
-        for tag, name, value in physician_data:
-            row_position = self.metadata_table.rowCount()
-            self.metadata_table.insertRow(row_position)
-            self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-            self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-            self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+        self.metadata_model.show_rows(physician_data)
 
 
     def display_image_info(self):
-        self.metadata_table.setRowCount(0)  # Clear existing rows
-
         # Populate table with image info
         image_data = [
             ("(0008,0008)", "Image Type", self.dicom_file.get('ImageType', 'N/A')),
@@ -581,18 +519,13 @@ class DicomViewer(QMainWindow):
             ("(0028,0011)", "Columns", self.dicom_file.get('Columns', 'N/A')),
         ]
 
+        rows = []
         for tag, name, value in image_data:
             # Convert value to a string if it's not a string
             if isinstance(value, bytes):
                 value = value.decode('utf-8', errors='ignore')  # Decode bytes to string
-            elif not isinstance(value, str):
-                value = str(value)  # Convert other types (e.g., numbers, lists) to string
-
-            row_position = self.metadata_table.rowCount()
-            self.metadata_table.insertRow(row_position)
-            self.metadata_table.setItem(row_position, 0, QTableWidgetItem(tag))
-            self.metadata_table.setItem(row_position, 1, QTableWidgetItem(name))
-            self.metadata_table.setItem(row_position, 2, QTableWidgetItem(value))
+            rows.append((tag, name, value))
+        self.metadata_model.show_rows(rows)
 
 
 
@@ -617,6 +550,13 @@ class DicomViewer(QMainWindow):
                 self.metadata_display.append("Anonymization cancelled.")
 
 
+    def closeEvent(self, event):
+        self.cine_player.close()
+        self.stop_frame_store()
+        self.tile_grid.shutdown()
+        super().closeEvent(event)
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     viewer = DicomViewer()
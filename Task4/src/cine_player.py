@@ -0,0 +1,214 @@
+import math
+import time
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+DEFAULT_INTERVAL_MS = 100                   #used when the file gives no frame timing
+BUFFER_FRAMES = 16                          #display-ready frames rendered ahead of the clock
+LATE_RETRY_MS = 2                           #how soon to look again when the due frame is not rendered yet
+FPS_WINDOW = 30                             #frames the achieved rate is measured over
+
+
+def frame_interval_ms(dataset, default=DEFAULT_INTERVAL_MS):
+    """Time between frames of a cine clip: FrameTime, else CineRate, else RecommendedDisplayFrameRate."""
+    frame_time = dataset.get("FrameTime")
+    if frame_time and float(frame_time) > 0:
+        return float(frame_time)
+    for keyword in ("CineRate", "RecommendedDisplayFrameRate"):
+        rate = dataset.get(keyword)
+        if rate and float(rate) > 0:
+            return 1000.0 / float(rate)
+    return float(default)
+
+
+def frame_image(pixels):
+    """QImage viewing a display-ready uint8 frame without copying it: (image, pixels it points into)."""
+    height, width = pixels.shape
+    return QImage(pixels.data, width, height, pixels.strides[0], QImage.Format_Grayscale8), pixels
+
+
+class CinePlayer(QObject):
+    """Plays the frames of a clip at their acquisition rate.
+
+    frames holds display-ready uint8 frames (a FrameStore). A worker thread renders
+    them into QImages in a buffer of buffer_frames frames ahead of the playback position. The GUI thread only picks, on a precise timer, the
+    frame that is due by the clock: frames whose time has passed are dropped, and the
+    worker skips them too, so a slow machine shows fewer frames but never plays slower.
+
+    Positions count up through the clip and keep counting when it loops; the frame at
+    a position is position % len(frames).
+    """
+
+    frame_ready = pyqtSignal(int, object)   #frame index, QImage (only valid during the call)
+    finished = pyqtSignal()
+
+    def __init__(self, render=frame_image, buffer_frames=BUFFER_FRAMES):
+        super().__init__()
+        self.render = render                #render(frame) -> (QImage, pixels it points into)
+        self.buffer_frames = buffer_frames
+        self.condition = threading.Condition()
+        self.buffer = deque()               #(position, image, pixels) in position order
+        self.frames = None
+        self.generation = 0                 #bumped on start/seek/stop: older renders are thrown away
+        self.next_position = 0              #next position the worker renders
+        self.target = 0                     #position due by the clock at the last tick
+        self.end = None                     #first position not played (None while looping)
+        self.loop = False
+        self.playing = False
+        self.closing = False
+        self.position = -1                  #position on screen
+        self.interval_ms = DEFAULT_INTERVAL_MS
+        self.origin_position, self.origin_time = 0, 0.0     #position due at origin_time
+        self.shown_times = deque(maxlen=FPS_WINDOW)
+        self.counters = {"shown": 0, "dropped": 0}
+        self.worker = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+    def __len__(self):
+        return len(self.frames) if self.frames is not None else 0
+
+    def index_of(self, position):
+        return position % len(self.frames)
+
+    def start(self, frames, interval_ms=DEFAULT_INTERVAL_MS, index=0):
+        """Play frames (anything with len() and [i]) from index."""
+        with self.condition:
+            self.frames = frames
+            self.interval_ms = max(float(interval_ms), 1.0)
+            self.counters = {"shown": 0, "dropped": 0}
+            self._restart(index - 1)
+            self.origin_position, self.origin_time = index, time.perf_counter()
+            self.playing = True
+        self.shown_times.clear()
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+        self.timer.start(0)
+
+    def _restart(self, position):
+        """Forget the buffer and render on from the frame after position (call under the condition)."""
+        self.generation += 1
+        self.buffer.clear()
+        self.position = position
+        self.next_position = self.target = position + 1
+        self.end = None if self.loop else len(self.frames)
+        self.condition.notify_all()
+
+    def pause(self):
+        self.playing = False
+        self.timer.stop()
+
+    def resume(self):
+        """Play on from the frame on screen; starts over when the clip has ended."""
+        if self.frames is None:
+            return
+        if self.end is not None and self.position + 1 >= self.end:
+            self.start(self.frames, self.interval_ms)
+            return
+        self.origin_position, self.origin_time = self.position + 1, time.perf_counter()
+        self.playing = True
+        self.shown_times.clear()
+        self.timer.start(0)
+
+    def seek(self, index):
+        """Show frame index now (rendered on the calling thread) and play on from it if playing."""
+        if self.frames is None:
+            return
+        index = min(max(int(index), 0), len(self.frames) - 1)
+        image, pixels = self.render(self.frames[index])
+        with self.condition:
+            self._restart(index)
+        self.frame_ready.emit(index, image)
+        if self.playing:
+            self.origin_position = index + 1
+            self.origin_time = time.perf_counter() + self.interval_ms / 1000
+            self.shown_times.clear()
+            self.timer.start(int(self.interval_ms))
+
+    def set_loop(self, loop):
+        with self.condition:
+            self.loop = loop
+            if self.frames is not None:
+                count = len(self.frames)
+                self.end = None if loop else (max(self.position, 0) // count + 1) * count
+            self.condition.notify_all()
+
+    def stop(self):
+        self.pause()
+        with self.condition:
+            self.frames = None
+            self.generation += 1
+            self.buffer.clear()
+            self.condition.notify_all()
+
+    def close(self):
+        self.stop()
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+
+    def fps(self):
+        """Frames per second actually shown over the last FPS_WINDOW frames."""
+        if len(self.shown_times) < 2:
+            return None
+        elapsed = self.shown_times[-1] - self.shown_times[0]
+        return (len(self.shown_times) - 1) / elapsed if elapsed > 0 else None
+
+    def _wants_frame(self):
+        return (self.frames is not None and len(self.buffer) < self.buffer_frames
+                and (self.end is None or max(self.next_position, self.target) < self.end))
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.closing and not self._wants_frame():
+                    self.condition.wait()
+                if self.closing:
+                    return
+                generation, frames = self.generation, self.frames
+                position = max(self.next_position, self.target)     #skip frames the clock has passed
+                self.next_position = position + 1
+            try:
+                image, pixels = self.render(frames[position % len(frames)])
+            except Exception as e:
+                print(f"Error rendering frame {position % len(frames)}: {e}")
+                continue
+            with self.condition:
+                if generation == self.generation:
+                    self.buffer.append((position, image, pixels))
+
+    def _tick(self):
+        if not self.playing:
+            return
+        now = time.perf_counter()
+        target = self.origin_position + math.floor((now - self.origin_time) * 1000 / self.interval_ms)
+        if self.end is not None and target >= self.end:
+            target = self.end - 1
+        shown = None
+        with self.condition:
+            self.target = target
+            while self.buffer and self.buffer[0][0] <= target:
+                shown = self.buffer.popleft()
+            self.condition.notify_all()
+        if shown is not None and shown[0] > self.position:
+            position, image, pixels = shown
+            self.counters["dropped"] += position - self.position - 1
+            self.counters["shown"] += 1
+            self.position = position
+            self.shown_times.append(now)
+            self.frame_ready.emit(self.index_of(position), image)
+        if self.end is not None and self.position >= self.end - 1:
+            self.pause()
+            self.finished.emit()
+            return
+        if self.position < target:          #the due frame is still being rendered
+            self.timer.start(LATE_RETRY_MS)
+            return
+        due = self.origin_time + (self.position + 1 - self.origin_position) * self.interval_ms / 1000
+        self.timer.start(max(0, math.ceil((due - time.perf_counter()) * 1000)))
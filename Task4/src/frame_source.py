@@ -0,0 +1,154 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+
+try:                                                    #pydicom >= 3 decodes a single frame of a dataset
+    from pydicom.pixels import pixel_array as decode_pixels
+except ImportError:
+    decode_pixels = None
+
+DEFER_SIZE = "1 MB"                                     #larger values (the pixel data) are only read when used
+FRAME_CACHE_SIZE = 64                                   #decoded frames kept in memory
+PIXEL_DATA = 0x7FE00010
+
+
+def number_of_frames(dataset):
+    return int(dataset.get("NumberOfFrames", 1) or 1)
+
+
+class FrameSource:
+    """The frames of a DICOM file, decoded one at a time when they are asked for.
+
+    Uncompressed pixel data is memory-mapped from the file (or, for a small file, viewed
+    in the bytes read with the header), so a frame costs a page-in and no copy. Encapsulated (compressed) frames are decoded on their own with
+    pydicom. Decoded frames go into a least-recently-used cache of cache_size frames,
+    so memory stays bounded whatever the length of the clip.
+
+    Behaves like the list of frames it replaces: len(source) and source[i].
+    """
+
+    def __init__(self, file_path, dataset, cache_size=FRAME_CACHE_SIZE):
+        self.file_path = file_path
+        self.dataset = dataset
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()                    #frames are also decoded by the playback worker
+        self.decode_lock = threading.Lock()             #pydicom reads deferred pixel data into the dataset
+        self.count = number_of_frames(dataset)
+        self.unused_bits = 0                            #high bits of each mapped word that are not pixel data
+        self.mapped = self._map_native()
+        self.full = None                                #whole decoded array (old pydicom only)
+        self.counters = {"hits": 0, "misses": 0}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.frame(index)
+
+    @property
+    def shape(self):
+        """Shape of one frame: (rows, columns) or (rows, columns, samples)."""
+        rows, columns = int(self.dataset.Rows), int(self.dataset.Columns)
+        samples = int(self.dataset.get("SamplesPerPixel", 1))
+        return (rows, columns) if samples == 1 else (rows, columns, samples)
+
+    def _map_native(self):
+        """View uncompressed little-endian pixel data in place (a memmap, or the bytes of a small file), else None."""
+        ds = self.dataset
+        syntax = ds.file_meta.get("TransferSyntaxUID") if hasattr(ds, "file_meta") else None
+        if syntax is None or syntax.is_encapsulated or not syntax.is_little_endian:
+            return None
+        bits = int(ds.get("BitsAllocated", 0))
+        if bits not in (8, 16, 32) or str(ds.get("PhotometricInterpretation", "")).startswith("YBR"):
+            return None                                 #packed bits and YBR->RGB need pydicom's decoder
+        stored = int(ds.get("BitsStored", bits))
+        if not 0 < stored <= bits or int(ds.get("HighBit", stored - 1)) != stored - 1:
+            return None                                 #pixel data not in the low bits: leave it to pydicom
+        raw = ds.get_item(PIXEL_DATA, keep_deferred=True)
+        if raw is None:
+            return None
+        dtype = np.dtype(f"<{'i' if int(ds.get('PixelRepresentation', 0)) == 1 else 'u'}{bits // 8}")
+        rows, columns = int(ds.Rows), int(ds.Columns)
+        samples = int(ds.get("SamplesPerPixel", 1))
+        frame_size = rows * columns * samples
+        size = frame_size * self.count
+        if isinstance(raw.value, bytes):                #small file: the pixel data was read with the header
+            if len(raw.value) < size * dtype.itemsize:
+                return None
+            data = np.frombuffer(raw.value, dtype=dtype, count=size)
+        elif raw.value is None and hasattr(raw, "value_tell") and raw.length >= size * dtype.itemsize:
+            data = np.memmap(self.file_path, dtype=dtype, mode="r", offset=raw.value_tell, shape=(size,))
+        else:
+            return None
+        self.unused_bits = bits - stored
+        if samples == 1:
+            return data.reshape(self.count, rows, columns)
+        if int(ds.get("PlanarConfiguration", 0)) == 1:  #colour planes one after the other
+            return data.reshape(self.count, samples, rows, columns).transpose(0, 2, 3, 1)
+        return data.reshape(self.count, rows, columns, samples)
+
+    def frame(self, index):
+        """Frame index as a numpy array, decoded on first use."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Frame {index} out of range (0..{self.count - 1})")
+        with self.lock:
+            frame = self.cache.get(index)
+            if frame is not None:
+                self.cache.move_to_end(index)
+                self.counters["hits"] += 1
+                return frame
+            self.counters["misses"] += 1
+        frame = self._decode(index)
+        with self.lock:
+            self.cache[index] = frame
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return frame
+
+    def _stored_values(self, words):
+        """Pixel values of mapped words: unused high bits masked off, signed values sign-extended (like pydicom)."""
+        if not self.unused_bits:
+            return words
+        if words.dtype.kind == "i":                     #shift the sign bit to the top and back
+            return (words << self.unused_bits) >> self.unused_bits
+        return words & ((1 << (8 * words.dtype.itemsize - self.unused_bits)) - 1)
+
+    def _decode(self, index):
+        if self.mapped is not None:
+            return self._stored_values(self.mapped[index])
+        with self.decode_lock:
+            return self._decode_pixels(index)
+
+    def _decode_pixels(self, index):
+        if decode_pixels is not None:
+            return decode_pixels(self.dataset, index=index if self.count > 1 else None)
+        if self.full is None:                           #old pydicom: no single-frame decoding
+            self.full = self.dataset.pixel_array
+        return self.full[index] if self.count > 1 else self.full
+
+    def batch(self, start, stop):
+        """Frames start..stop as one (frames, rows, columns[, samples]) array.
+
+        A view on the pixel data when it is mapped (a copy when unused high bits need
+        masking); otherwise the frames are decoded one by one (cached ones are reused)
+        without being added to the cache.
+        """
+        stop = min(stop, self.count)
+        if self.mapped is not None:
+            return self._stored_values(self.mapped[start:stop])
+        batch = None
+        for index in range(start, stop):
+            with self.lock:
+                frame = self.cache.get(index)
+            if frame is None:
+                frame = self._decode(index)
+            if batch is None:
+                batch = np.empty((stop - start,) + frame.shape, dtype=frame.dtype)
+            batch[index - start] = frame
+        return batch
+
+    def frames(self, start=0, stop=None):
+        """Iterate over frames without keeping them all."""
+        for index in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.frame(index)
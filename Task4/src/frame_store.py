@@ -0,0 +1,213 @@
+import os
+import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pydicom.multival import MultiValue
+
+try:
+    from pydicom.pixels import apply_modality_lut, apply_voi_lut
+except ImportError:                                     #pydicom < 3
+    from pydicom.pixel_data_handlers.util import apply_modality_lut, apply_voi_lut
+
+BATCH_FRAMES = 16                                       #frames read or decoded per build task
+BLOCK_PIXELS = 2 ** 16                                  #pixels per lookup pass: the index copy numpy makes stays in cache
+PARALLEL_PIXELS = 2 ** 24                               #smaller clips are converted on the calling thread, without a pool
+WINDOW_SAMPLE_FRAMES = 16                               #frames the window is estimated from when the file has none
+MAX_STORE_BYTES = 2 ** 30                               #longer clips are converted frame by frame instead
+GRAY_WEIGHTS = (77, 150, 29)                            #0.299 R + 0.587 G + 0.114 B in 1/256ths
+
+
+def default_workers():
+    return min(4, os.cpu_count() or 1)
+
+
+def sample_indices(count, samples=WINDOW_SAMPLE_FRAMES):
+    """Up to samples frame indices spread evenly over a clip of count frames."""
+    return np.unique(np.linspace(0, count - 1, min(count, samples)).astype(int))
+
+
+def to_gray(batch):
+    """Grayscale of a batch of RGB frames: uint8 for 8-bit frames (integer weights), else float32."""
+    if batch.dtype == np.uint8:
+        red, green, blue = GRAY_WEIGHTS
+        gray = batch[..., 0] * np.uint16(red)
+        gray += batch[..., 1] * np.uint16(green)
+        gray += batch[..., 2] * np.uint16(blue)
+        gray += np.uint16(128)
+        return (gray >> 8).astype(np.uint8)
+    return batch.astype(np.float32) @ (np.array(GRAY_WEIGHTS, dtype=np.float32) / 256)
+
+
+def first_value(value):
+    """First of a multi-valued element (e.g. several windows), else the value, as a float."""
+    return float(value[0] if isinstance(value, MultiValue) else value)
+
+
+def window_lut(values, low, high):
+    """uint8 of values windowed linearly from low (black) to high (white)."""
+    if high <= low:
+        return np.zeros(values.shape, dtype=np.uint8)
+    return np.clip((values - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+
+
+def pair_lut(lut):
+    """65536-entry table mapping two 8-bit pixels read as one uint16 (little-endian) through a 256-entry lut."""
+    pairs = np.arange(2 ** 16, dtype=np.uint16)
+    return (lut[pairs & 0xFF].astype(np.uint16) | (lut[pairs >> 8].astype(np.uint16) << 8)).astype("<u2")
+
+
+class FrameStore:
+    """A whole clip converted once into display-ready 8-bit frames.
+
+    All frames use the same window: the VOI LUT or WindowCenter/WindowWidth of the file,
+    else the range of a sample of frames, so the brightness does not flicker from frame
+    to frame. Integer data of up to 16 bits goes through a lookup table built once from
+    the modality rescale and that window (8-bit data two pixels at a time, through
+    pair_lut()); colour frames are turned to grayscale first.
+
+    The frames live in one contiguous (frames, rows, columns) uint8 buffer, filled in
+    batches by build(), on a worker pool for clips of more than PARALLEL_PIXELS pixels.
+    A frame asked for before its batch is done is converted on the spot. Clips larger
+    than max_bytes get no buffer and are converted per frame.
+    """
+
+    def __init__(self, frames, dataset, batch_frames=BATCH_FRAMES, max_bytes=MAX_STORE_BYTES, workers=None):
+        self.frames = frames                            #FrameSource (len(), [i] and batch(start, stop))
+        self.dataset = dataset
+        self.batch_frames = batch_frames
+        self.workers = workers or default_workers()
+        self.count = len(frames)
+        self.color = len(frames.shape) == 3
+        rows, columns = frames.shape[:2]
+        size = self.count * rows * columns
+        self.pixels = np.empty((self.count, rows, columns), dtype=np.uint8) if size <= max_bytes else None
+        self.done = np.zeros(self.count, dtype=bool)    #frames already in the buffer
+        self.cancelled = threading.Event()
+        self.lut, self.window = self._make_window(frames[0])
+        self.pair_lut = pair_lut(self.lut) if self.lut is not None and self.lut.size == 256 else None
+        self.seconds = None                             #time build() took
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """Display-ready frame index (a view on the buffer)."""
+        if self.pixels is None:
+            return self.convert(self.frames[index][np.newaxis])[0]
+        if not self.done[index]:
+            self.convert(self.frames[index][np.newaxis], out=self.pixels[index:index + 1])
+            self.done[index] = True
+        return self.pixels[index]
+
+    @property
+    def shape(self):
+        return self.frames.shape[:2]
+
+    def batch(self, start, stop):
+        """Display-ready frames start..stop as one array (a view on the buffer when there is one)."""
+        stop = min(stop, self.count)
+        if self.pixels is None:
+            return self.convert(self.frames.batch(start, stop))
+        if not self.done[start:stop].all():
+            self.convert(self.frames.batch(start, stop), out=self.pixels[start:stop])
+            self.done[start:stop] = True
+        return self.pixels[start:stop]
+
+    def _make_window(self, first):
+        """(lut, None) when a lookup table applies to the stored values, else (None, (low, high))."""
+        ds = self.dataset
+        gray = to_gray(first[np.newaxis])[0] if self.color else first
+        if gray.dtype.kind not in "ui" or gray.dtype.itemsize > 2:
+            return None, self._sample_window(lambda values: values)
+        unsigned = np.dtype(f"u{gray.dtype.itemsize}")
+        stored = np.arange(2 ** (8 * gray.dtype.itemsize), dtype=unsigned).view(gray.dtype)
+        if self.color:                                  #rescale and VOI only apply to grayscale data
+            return window_lut(stored, *self._sample_window(lambda values: values)), None
+        values = apply_modality_lut(stored, ds)
+        if "VOILUTSequence" in ds:
+            values = apply_voi_lut(values, ds, index=0, prefer_lut=True).astype(np.float64)
+            return window_lut(values, values.min(), values.max()), None
+        if "WindowCenter" in ds and "WindowWidth" in ds:
+            center, width = first_value(ds.WindowCenter), first_value(ds.WindowWidth)
+            low, high = center - width / 2, center + width / 2
+        else:                                           #stored range of a sample: a min/max, no per-pixel rescale
+            smallest, largest = self._sample_window(lambda frame: frame)
+            covered = values[(stored >= smallest) & (stored <= largest)]
+            low, high = float(covered.min()), float(covered.max())
+        return window_lut(values.astype(np.float64), low, high), None
+
+    def _sample_window(self, values_of):
+        """Range of values_of(grayscale frame) over a sample of frames."""
+        low, high = np.inf, -np.inf
+        for index in sample_indices(self.count):
+            frame = self.frames[int(index)]
+            values = values_of(to_gray(frame) if self.color else frame)
+            low, high = min(low, float(values.min())), max(high, float(values.max()))
+        return low, high
+
+    def convert(self, batch, out=None):
+        """uint8 display frames of a batch of stored frames, written into out (allocated if None)."""
+        if out is None:
+            out = np.empty(batch.shape[:3], dtype=np.uint8)
+        if self.lut is not None and not self.color:
+            self._lookup(batch, out)
+            return out
+        step = max(1, BLOCK_PIXELS // (batch.shape[1] * batch.shape[2]))
+        for start in range(0, len(batch), step):
+            self._convert_block(batch[start:start + step], out[start:start + step])
+        return out
+
+    def _lookup(self, gray, out):
+        """out = lut[gray], BLOCK_PIXELS at a time; 8-bit pixels go through pair_lut two at a time."""
+        stored = gray.view(np.dtype(f"u{gray.dtype.itemsize}"))      #the stored bits index the table directly
+        if not (stored.flags.c_contiguous and out.flags.c_contiguous):
+            np.take(self.lut, stored, out=out, mode="clip")
+            return
+        stored, out, lut = stored.reshape(-1), out.reshape(-1), self.lut
+        if self.pair_lut is not None and stored.size % 2 == 0:
+            stored, out, lut = stored.view("<u2"), out.view("<u2"), self.pair_lut
+        for start in range(0, stored.size, BLOCK_PIXELS):
+            np.take(lut, stored[start:start + BLOCK_PIXELS], out=out[start:start + BLOCK_PIXELS], mode="clip")
+
+    def _convert_block(self, block, out):
+        gray = to_gray(block) if self.color else block
+        if self.lut is not None:
+            self._lookup(gray, out)
+            return
+        low, high = self.window
+        if high <= low:
+            out[...] = 0
+            return
+        values = gray.astype(np.float32)
+        values -= low
+        values *= 255.0 / (high - low)
+        np.clip(values, 0, 255, out=values)
+        out[...] = values
+
+    def _build_batch(self, start):
+        stop = min(start + self.batch_frames, self.count)
+        if self.cancelled.is_set() or self.done[start:stop].all():
+            return
+        self.convert(self.frames.batch(start, stop), out=self.pixels[start:stop])
+        self.done[start:stop] = True
+
+    def build(self):
+        """Fill the whole buffer, batches spread over the workers for long clips; returns the seconds it took."""
+        start_time = time.perf_counter()
+        if self.pixels is not None:
+            starts = range(0, self.count, self.batch_frames)
+            if self.workers > 1 and self.pixels.size > PARALLEL_PIXELS:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    list(executor.map(self._build_batch, starts))
+            else:                                       #a pool costs more than it saves on a short clip
+                for start in starts:
+                    self._build_batch(start)
+        self.seconds = time.perf_counter() - start_time
+        return self.seconds
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def complete(self):
+        return self.pixels is not None and bool(self.done.all())
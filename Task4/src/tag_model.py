@@ -0,0 +1,135 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from pydicom.datadict import dictionary_description, dictionary_VR
+from pydicom.multival import MultiValue
+
+FETCH_ROWS = 256                            #rows added each time the view scrolls near the end
+MAX_VALUE_CHARS = 200                       #longer values are cut in the table
+MAX_VALUES = 16                             #values of a multi-valued element that are shown
+NOT_RENDERED = ("Pixel Data",)              #elements left out of the tag list
+
+
+def is_deferred(dataset, tag):
+    """True for a value left on disk when the file was read (e.g. the pixel data); sequences are read to list their items."""
+    raw = dataset.get_item(tag, keep_deferred=True)
+    if not getattr(raw, "is_raw", False) or raw.value is not None:
+        return False
+    try:
+        return (raw.VR or dictionary_VR(tag)) != "SQ"
+    except KeyError:
+        return True
+
+
+def element_name(dataset, tag):
+    if is_deferred(dataset, tag):
+        try:
+            return dictionary_description(tag)
+        except KeyError:
+            return "Private tag data" if tag.is_private else "[Unknown]"
+    return dataset[tag].name
+
+
+def value_text(dataset, tag):
+    """Short text of an element's value: sequences, binary data and long lists are summarised, not printed."""
+    if is_deferred(dataset, tag):
+        return f"Binary data: {dataset.get_item(tag, keep_deferred=True).length} bytes"
+    element = dataset[tag]
+    value = element.value
+    if element.VR == "SQ":
+        return f"Sequence of {len(value)} item(s)"
+    if isinstance(value, (bytes, bytearray)):
+        return f"Binary data: {len(value)} bytes"
+    if isinstance(value, MultiValue) and len(value) > MAX_VALUES:
+        text = "[" + ", ".join(str(item) for item in value[:MAX_VALUES]) + f", ... ({len(value)} values)]"
+    else:
+        text = str(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "..."
+
+
+def walk(dataset, depth=0):
+    """(depth, dataset, tag) of every element in the order of Dataset.iterall(), without reading values."""
+    for tag in sorted(dataset.keys()):
+        yield depth, dataset, tag
+        if not is_deferred(dataset, tag) and dataset[tag].VR == "SQ":
+            for item in dataset[tag].value:
+                yield from walk(item, depth + 1)
+
+
+class MetadataTableModel(QAbstractTableModel):
+    """Tag / Name / Value rows for the metadata table.
+
+    show_dataset() lists every element of a dataset lazily: elements are walked
+    FETCH_ROWS at a time as the view scrolls down (canFetchMore/fetchMore), and a
+    row's text is only made, truncated, when the view paints it. Opening the list
+    costs the same for a header of a hundred elements or a hundred thousand.
+    show_rows() shows a few ready-made rows (patient info, study info, ...).
+    """
+
+    HEADERS = ("Tag", "Name", "Value")
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []                      #(tag, name, value) strings, or (depth, dataset, tag) while lazy
+        self.lazy = False
+        self.walker = None                  #remaining elements of the dataset shown
+        self.match = None                   #keep only elements whose name passes match(name)
+        self.texts = {}                     #row -> its (tag, name, value) strings, once painted
+
+    def show_rows(self, rows):
+        self.beginResetModel()
+        self.rows = [tuple(str(text) for text in row) for row in rows]
+        self.lazy, self.walker, self.texts = False, None, {}
+        self.endResetModel()
+
+    def show_dataset(self, dataset, match=None):
+        """List the elements of dataset (only those whose name passes match); fetches the first rows."""
+        self.beginResetModel()
+        self.rows, self.texts = [], {}
+        self.lazy, self.walker, self.match = True, walk(dataset), match
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.walker is not None
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.walker is None:
+            return
+        new_rows = []
+        for depth, dataset, tag in self.walker:
+            name = element_name(dataset, tag)
+            if name in NOT_RENDERED or (self.match is not None and not self.match(name)):
+                continue
+            new_rows.append((depth, dataset, tag))
+            if len(new_rows) >= FETCH_ROWS:
+                break
+        else:
+            self.walker = None              #every element was seen
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(new_rows) - 1)
+            self.rows.extend(new_rows)
+            self.endInsertRows()
+
+    def row_texts(self, row):
+        if not self.lazy:
+            return self.rows[row]
+        texts = self.texts.get(row)
+        if texts is None:
+            depth, dataset, tag = self.rows[row]
+            texts = self.texts[row] = (str(tag), "  " * depth + element_name(dataset, tag), value_text(dataset, tag))
+        return texts
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.row_texts(index.row())[index.column()]
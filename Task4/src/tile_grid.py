@@ -0,0 +1,191 @@
+import math
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPixmap, QTransform
+from PyQt5.QtWidgets import QGraphicsPixmapItem
+from frame_store import default_workers
+
+TILE_SIZE = 100                             #width and height of a tile in scene units
+TILE_PADDING = 20
+TILE_COLUMNS = 5
+MARGIN_ROWS = 2                             #rows of tiles kept ready above and below the viewport
+CHUNK_TILES = 8                             #consecutive frames reduced together by one worker task
+CACHE_BYTES = 256 * 2 ** 20                 #pixmaps kept for tiles that scrolled out of view
+UPDATE_DELAY_MS = 15                        #scroll and zoom events are handled together after this
+
+
+def lod_factor(shape, displayed_size):
+    """Largest power-of-two reduction of a frame whose sides are still displayed_size pixels or more.
+
+    1 means full resolution, which a tile only gets once it is shown at more than half
+    the size of its frame.
+    """
+    factor = 1
+    while min(shape) // (factor * 2) >= max(displayed_size, 1):
+        factor *= 2
+    return factor
+
+
+def block_reduce(frames, factor):
+    """Mean over factor x factor blocks of a batch of uint8 frames; edges that do not fill a block are cut."""
+    if factor == 1:
+        return frames
+    count, rows, columns = frames.shape
+    rows, columns = rows // factor * factor, columns // factor * factor
+    sums = frames[:, :rows, :columns].reshape(count, rows, columns // factor, factor).sum(axis=3, dtype=np.uint32)
+    sums = sums.reshape(count, rows // factor, factor, columns // factor).sum(axis=2)
+    return (sums // (factor * factor)).astype(np.uint8)
+
+
+class TileGrid(QObject):
+    """The frames of a clip as a grid of tiles in a QGraphicsView, built only where the view looks.
+
+    Only the tiles in the viewport (and MARGIN_ROWS rows around it) have an item in the
+    scene. Their pixmaps come at a level of detail that matches the zoom: a worker pool
+    block-reduces CHUNK_TILES frames at a time by a power of two, and the full-resolution
+    frame is only used once a tile is shown at more than half its frame size. Pixmaps of
+    tiles that scroll away stay in a least-recently-used cache of CACHE_BYTES.
+    """
+
+    reduced = pyqtSignal(int, int, int, object)      #generation, first frame, factor, reduced frames
+
+    def __init__(self, view, workers=None):
+        super().__init__()
+        self.view = view
+        self.scene = view.scene()
+        self.executor = ThreadPoolExecutor(max_workers=workers or default_workers())
+        self.store = None                   #display-ready frames (FrameStore)
+        self.generation = 0                 #bumped by clear(): older results are dropped
+        self.items = {}                     #frame index -> [item, factor of its pixmap (None: placeholder)]
+        self.pending = {}                   #(first frame of chunk, factor) -> future
+        self.cache = OrderedDict()          #(frame index, factor) -> pixmap
+        self.cache_bytes = 0
+        self.counters = {"reduced": 0, "cache_hits": 0}
+
+        self.placeholder = QPixmap(TILE_SIZE, TILE_SIZE)
+        self.placeholder.fill(QColor(40, 40, 40))
+        self.reduced.connect(self._on_reduced)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.update_tiles)
+        view.horizontalScrollBar().valueChanged.connect(self.schedule_update)
+        view.verticalScrollBar().valueChanged.connect(self.schedule_update)
+
+    def set_store(self, store):
+        """Show the frames of store; the scene gets the size of the whole grid but no items yet."""
+        self.clear()
+        self.store = store
+        rows = math.ceil(len(store) / TILE_COLUMNS)
+        pitch = TILE_SIZE + TILE_PADDING
+        self.scene.setSceneRect(0, 0, TILE_COLUMNS * pitch, rows * pitch)
+        self.schedule_update()
+
+    def clear(self):
+        self.generation += 1
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.cache.clear()
+        self.cache_bytes = 0
+        self.counters = {"reduced": 0, "cache_hits": 0}
+        self.items.clear()
+        self.scene.clear()
+        self.store = None
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def schedule_update(self, *args):
+        if self.store is not None and not self.timer.isActive():
+            self.timer.start(UPDATE_DELAY_MS)
+
+    def visible_range(self):
+        """Frame indices [first, last) of the tiles in the viewport and MARGIN_ROWS rows around it."""
+        rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        pitch = TILE_SIZE + TILE_PADDING
+        first_row = max(0, int(rect.top() // pitch) - MARGIN_ROWS)
+        last_row = max(0, int(rect.bottom() // pitch) + 1 + MARGIN_ROWS)
+        return first_row * TILE_COLUMNS, min(len(self.store), last_row * TILE_COLUMNS)
+
+    def current_factor(self):
+        return lod_factor(self.store.shape, TILE_SIZE * self.view.transform().m11())
+
+    def update_tiles(self):
+        """Create the items that came into view, drop the ones that left it, ask for missing pixmaps."""
+        if self.store is None:
+            return
+        first, last = self.visible_range()
+        factor = self.current_factor()
+        for index in [index for index in self.items if not first <= index < last]:
+            self.scene.removeItem(self.items.pop(index)[0])
+        for key, future in list(self.pending.items()):
+            start, chunk_factor = key
+            if (chunk_factor != factor or start + CHUNK_TILES <= first or start >= last) and future.cancel():
+                del self.pending[key]
+
+        missing = set()
+        pitch = TILE_SIZE + TILE_PADDING
+        for index in range(first, last):
+            entry = self.items.get(index)
+            if entry is None:
+                item = QGraphicsPixmapItem()
+                item.setTransformationMode(Qt.SmoothTransformation)
+                row, column = divmod(index, TILE_COLUMNS)
+                item.setPos(column * pitch, row * pitch)
+                self.scene.addItem(item)
+                entry = self.items[index] = [item, None]
+                self._show(entry, self.placeholder, None)
+            if entry[1] == factor:
+                continue
+            pixmap = self._cached(index, factor)
+            if pixmap is not None:
+                self._show(entry, pixmap, factor)
+            else:
+                missing.add(index // CHUNK_TILES * CHUNK_TILES)
+
+        for start in sorted(missing):
+            if (start, factor) not in self.pending:
+                self.pending[(start, factor)] = self.executor.submit(self._reduce, self.generation, self.store,
+                                                                     start, factor)
+
+    def _show(self, entry, pixmap, factor):
+        item = entry[0]
+        item.setPixmap(pixmap)
+        item.setTransform(QTransform.fromScale(TILE_SIZE / pixmap.width(), TILE_SIZE / pixmap.height()))
+        entry[1] = factor
+
+    def _cached(self, index, factor):
+        pixmap = self.cache.get((index, factor))
+        if pixmap is not None:
+            self.cache.move_to_end((index, factor))
+            self.counters["cache_hits"] += 1
+        return pixmap
+
+    def _reduce(self, generation, store, start, factor):
+        try:
+            frames = store.batch(start, start + CHUNK_TILES)
+            self.reduced.emit(generation, start, factor, np.ascontiguousarray(block_reduce(frames, factor)))
+        except Exception as e:
+            print(f"Error reducing tiles {start}..{start + CHUNK_TILES - 1}: {e}")
+
+    def _on_reduced(self, generation, start, factor, frames):
+        if generation != self.generation:
+            return
+        self.pending.pop((start, factor), None)
+        self.counters["reduced"] += len(frames)
+        current = self.current_factor()
+        for offset, pixels in enumerate(frames):
+            index = start + offset
+            height, width = pixels.shape
+            pixmap = QPixmap.fromImage(QImage(pixels.data, width, height, width, QImage.Format_Grayscale8))
+            self.cache[(index, factor)] = pixmap
+            self.cache_bytes += width * height
+            entry = self.items.get(index)
+            if entry is not None and (factor == current or entry[1] is None):
+                self._show(entry, pixmap, factor)
+        while self.cache_bytes > CACHE_BYTES and self.cache:
+            (index, factor), pixmap = self.cache.popitem(last=False)
+            self.cache_bytes -= pixmap.width() * pixmap.height()